@@ -7,12 +7,29 @@ import aiohttp
 import os
 import json
 import numpy as np
+import orjson
+import time
+from array import array
+from collections import namedtuple
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Major cities used by the TEMPO fallback for the urban/rural factor, built once at import
+TEMPO_URBAN_COORDS = np.array([
+    (40.7128, -74.0060),  # NYC
+    (34.0522, -118.2437), # LA
+    (41.8781, -87.6298),  # Chicago
+    (43.6532, -79.3832),  # Toronto
+    (25.7617, -80.1918)   # Miami
+])
+TEMPO_URBAN_BOX_DEG = 2
+
+# Columnar (SoA) storage of the station measurements of one pollutant
+PollutantColumn = namedtuple('PollutantColumn', 'values unit')
+
 class EnhancedRealTimeConnector:
     """
     Enhanced connector that integrates:
@@ -24,6 +41,13 @@ class EnhancedRealTimeConnector:
     - International space agency data
     """
     
+    # Earthdata credential checks are cached (per username) for the token lifetime
+    AUTH_CACHE_TTL = 3600
+    _auth_cache: Dict[str, float] = {}
+    
+    # Only the closest stations are fused, so never request/parse more than that
+    OPENAQ_MAX_STATIONS = 10
+    
     def __init__(self, nasa_username=None, nasa_password=None, nasa_token=None):
         self.nasa_username = nasa_username
         self.nasa_password = nasa_password
@@ -66,12 +90,16 @@ class EnhancedRealTimeConnector:
                 logger.warning("NASA credentials not provided, using public data only")
                 return True
                 
+            if time.time() < self._auth_cache.get(self.nasa_username, 0.0):
+                return True
+                
             # Test authentication with a simple request
             if self.session:
                 auth_url = f"{self.endpoints['nasa_earthdata']}/profile"
                 auth = aiohttp.BasicAuth(self.nasa_username, self.nasa_password)
                 async with self.session.get(auth_url, auth=auth) as response:
                     if response.status == 200:
+                        EnhancedRealTimeConnector._auth_cache[self.nasa_username] = time.time() + self.AUTH_CACHE_TTL
                         logger.info("NASA authentication successful")
                         return True
                     else:
@@ -98,21 +126,22 @@ class EnhancedRealTimeConnector:
         return (self.tempo_coverage['lat_min'] <= lat <= self.tempo_coverage['lat_max'] and
                 self.tempo_coverage['lon_min'] <= lon <= self.tempo_coverage['lon_max'])
     
-    async def get_openaq_realtime_data(self, lat: float, lon: float, radius_km: int = 50) -> Dict[str, Any]:
+    async def get_openaq_realtime_data(self, lat: float, lon: float, radius_km: int = 50,
+                                       now_iso: Optional[str] = None) -> Dict[str, Any]:
         """Get real-time data from OpenAQ global network"""
         try:
             url = f"{self.endpoints['openaq_v3']}/locations"
             params = {
                 'coordinates': f"{lat},{lon}",
                 'radius': radius_km * 1000,  # Convert to meters
-                'limit': 20,
+                'limit': self.OPENAQ_MAX_STATIONS,
                 'sort': 'distance'
             }
             
             async with self.session.get(url, params=params) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    return await self._process_openaq_data(data, lat, lon)
+                    data = orjson.loads(await response.read())
+                    return await self._process_openaq_data(data, lat, lon, now_iso)
                 else:
                     logger.warning(f"OpenAQ API returned status {response.status}")
                     return self._get_fallback_data(lat, lon, 'OpenAQ')
@@ -121,16 +150,18 @@ class EnhancedRealTimeConnector:
             logger.error(f"OpenAQ connection error: {e}")
             return self._get_fallback_data(lat, lon, 'OpenAQ')
     
-    async def _process_openaq_data(self, data: Dict, lat: float, lon: float) -> Dict[str, Any]:
+    async def _process_openaq_data(self, data: Dict, lat: float, lon: float,
+                                   now_iso: Optional[str] = None) -> Dict[str, Any]:
         """Process real OpenAQ data"""
         if not data.get('results'):
             return self._get_fallback_data(lat, lon, 'OpenAQ')
         
-        # Get latest measurements from closest stations
-        latest_measurements = {}
+        # Get latest measurements from closest stations, accumulated as one
+        # column of values per pollutant
+        columns = {}
         station_count = 0
         
-        for station in data['results'][:10]:
+        for station in data['results'][:self.OPENAQ_MAX_STATIONS]:
             if station.get('coordinates'):
                 station_lat = station['coordinates']['latitude']
                 station_lon = station['coordinates']['longitude']
@@ -145,32 +176,28 @@ class EnhancedRealTimeConnector:
                             param_name = param.get('parameter', '').lower()
                             if param_name in ['pm25', 'pm10', 'no2', 'o3', 'so2', 'co']:
                                 if param.get('lastValue') is not None:
-                                    if param_name not in latest_measurements:
-                                        latest_measurements[param_name] = []
-                                    latest_measurements[param_name].append({
-                                        'value': param['lastValue'],
-                                        'unit': param.get('unit', 'µg/m³'),
-                                        'station': station.get('name', 'Unknown'),
-                                        'distance_km': round(distance, 1)
-                                    })
+                                    col = columns.get(param_name)
+                                    if col is None:
+                                        col = columns[param_name] = PollutantColumn(
+                                            array('d'), param.get('unit', 'µg/m³')
+                                        )
+                                    col.values.append(float(param['lastValue']))
         
         # Average values from multiple stations
         averaged_data = {}
-        for pollutant, measurements in latest_measurements.items():
-            if measurements:
-                avg_value = np.mean([m['value'] for m in measurements])
-                averaged_data[pollutant] = {
-                    'value': round(avg_value, 2),
-                    'unit': measurements[0]['unit'],
-                    'station_count': len(measurements),
-                    'source': 'OpenAQ Network'
-                }
+        for pollutant, col in columns.items():
+            averaged_data[pollutant] = {
+                'value': round(float(np.mean(np.frombuffer(col.values))), 2),
+                'unit': col.unit,
+                'station_count': len(col.values),
+                'source': 'OpenAQ Network'
+            }
         
         return {
             'data': averaged_data,
             'stations_found': station_count,
             'source': 'OpenAQ Global Network',
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': now_iso or datetime.utcnow().isoformat(),
             'location': [lat, lon]
         }
     
@@ -241,20 +268,9 @@ class EnhancedRealTimeConnector:
     
     def _get_tempo_fallback_data(self, lat: float, lon: float) -> Dict:
         """Generate realistic TEMPO data when real data unavailable"""
-        # Urban vs rural variation
-        urban_factor = 1.0
-        major_cities = [
-            (40.7128, -74.0060),  # NYC
-            (34.0522, -118.2437), # LA
-            (41.8781, -87.6298),  # Chicago
-            (43.6532, -79.3832),  # Toronto
-            (25.7617, -80.1918)   # Miami
-        ]
-        
-        for city_lat, city_lon in major_cities:
-            if abs(lat - city_lat) < 2 and abs(lon - city_lon) < 2:
-                urban_factor = 1.5
-                break
+        # Urban vs rural variation (within a 2-degree box of a major city)
+        near_city = (np.abs(TEMPO_URBAN_COORDS - (lat, lon)) < TEMPO_URBAN_BOX_DEG).all(axis=1).any()
+        urban_factor = 1.5 if near_city else 1.0
         
         return {
             'no2': {
@@ -313,10 +329,15 @@ class EnhancedRealTimeConnector:
     
     async def get_comprehensive_data(self, lat: float, lon: float) -> Dict[str, Any]:
         """Get comprehensive air quality data from all sources"""
+        # Timestamp built once per request and reused by every source; the
+        # coordinate string is only for log lines (sources get full precision)
+        now_iso = datetime.utcnow().isoformat()
+        coord_str = f"{lat:.4f},{lon:.4f}"
         try:
+            logger.info(f"Collecting comprehensive data for {coord_str}")
             # Gather data from all sources in parallel
             tasks = [
-                self.get_openaq_realtime_data(lat, lon),
+                self.get_openaq_realtime_data(lat, lon, now_iso=now_iso),
                 self.get_nasa_tempo_data(lat, lon)
             ]
             
@@ -326,19 +347,20 @@ class EnhancedRealTimeConnector:
             tempo_data = results[1] if not isinstance(results[1], Exception) else {}
             
             # Combine and process data
-            combined_data = self._combine_data_sources(openaq_data, tempo_data, lat, lon)
+            combined_data = self._combine_data_sources(openaq_data, tempo_data, lat, lon, now_iso)
             
             return combined_data
             
         except Exception as e:
-            logger.error(f"Error getting comprehensive data: {e}")
+            logger.error(f"Error getting comprehensive data for {coord_str}: {e}")
             return self._get_fallback_data(lat, lon, 'Combined Sources')
     
-    def _combine_data_sources(self, openaq_data: Dict, tempo_data: Dict, lat: float, lon: float) -> Dict:
+    def _combine_data_sources(self, openaq_data: Dict, tempo_data: Dict, lat: float, lon: float,
+                              now_iso: Optional[str] = None) -> Dict:
         """Combine data from multiple sources intelligently"""
         combined = {
             'location': {'latitude': lat, 'longitude': lon},
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': now_iso or datetime.utcnow().isoformat(),
             'sources': [],
             'pollutants': {},
             'data_quality': 'MIXED'
@@ -369,21 +391,21 @@ class EnhancedRealTimeConnector:
                             'quality': data.get('quality', 'ESTIMATED')
                         }
         
-        # Calculate overall AQI
-        if combined['pollutants']:
-            aqi_values = []
-            for pollutant, data in combined['pollutants'].items():
-                if pollutant in ['pm25', 'pm10', 'no2', 'o3', 'so2']:
-                    aqi = self._calculate_aqi(pollutant, data['value'])
-                    if aqi:
-                        aqi_values.append(aqi)
-            
-            if aqi_values:
-                combined['aqi'] = {
-                    'value': max(aqi_values),  # Use highest AQI
-                    'category': self._get_aqi_category(max(aqi_values)),
-                    'dominant_pollutant': self._get_dominant_pollutant(combined['pollutants'])
-                }
+        # Calculate overall AQI (highest sub-index) and dominant pollutant in one pass
+        max_aqi = 0
+        dominant = 'pm25'
+        for pollutant, data in combined['pollutants'].items():
+            aqi = self._calculate_aqi(pollutant, data['value'])
+            if aqi and aqi > max_aqi:
+                max_aqi = aqi
+                dominant = pollutant
+        
+        if max_aqi:
+            combined['aqi'] = {
+                'value': max_aqi,
+                'category': self._get_aqi_category(max_aqi),
+                'dominant_pollutant': dominant
+            }
         
         return combined
     
@@ -429,16 +451,3 @@ class EnhancedRealTimeConnector:
                 return info
         
         return {'level': 'Hazardous', 'color': '#7E0023'}
-    
-    def _get_dominant_pollutant(self, pollutants: Dict) -> str:
-        """Find the pollutant contributing most to AQI"""
-        max_aqi = 0
-        dominant = 'pm25'
-        
-        for pollutant, data in pollutants.items():
-            aqi = self._calculate_aqi(pollutant, data['value'])
-            if aqi and aqi > max_aqi:
-                max_aqi = aqi
-                dominant = pollutant
-        
-        return dominant
\ No newline at end of file
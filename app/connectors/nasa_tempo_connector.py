@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 import logging
 import base64
+import time
 from urllib.parse import urlencode
 
 logger = logging.getLogger(__name__)
@@ -20,6 +21,11 @@ class NASATempoConnector:
     Connects to actual NASA Earthdata and TEMPO APIs
     """
     
+    # Earthdata tokens are valid for about an hour; successful validations are
+    # shared across instances so each request does not re-hit the token endpoint
+    TOKEN_CACHE_TTL = 3600
+    _token_cache: Dict[str, float] = {}
+    
     def __init__(self, username: str = None, password: str = None, token: str = None):
         self.username = username
         self.password = password
@@ -108,7 +114,10 @@ class NASATempoConnector:
         try:
             # Method 1: Try with existing token first if provided
             if self.token:
+                if time.time() < self._token_cache.get(self.token, 0.0):
+                    return True
                 if await self._validate_token():
+                    NASATempoConnector._token_cache[self.token] = time.time() + self.TOKEN_CACHE_TTL
                     logger.info("Existing NASA token is valid")
                     return True
             
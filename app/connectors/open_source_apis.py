@@ -2,10 +2,13 @@
 Connecteurs pour APIs Open Source de Qualité de l'Air
 Intègre: OpenAQ, AirNow, WAQI, AirVisual, PurpleAir
 """
+import asyncio
 import aiohttp
+import orjson
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
+from dataclasses import dataclass, field
 from typing import Dict, Optional, List
 from dotenv import load_dotenv
 
@@ -15,10 +18,24 @@ load_dotenv(env_path)
 
 logger = logging.getLogger(__name__)
 
+def _utc_timestamp() -> str:
+    """Horodatage ISO 8601 UTC suffixé 'Z'"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+@dataclass(slots=True)
+class SourceResult:
+    """Résultat normalisé d'une API open source (converti en dict seulement à la sortie)"""
+    
+    pollutants: Dict[str, Optional[float]]
+    source: str
+    data_quality: str
+    timestamp: str
+    extra: Dict = field(default_factory=dict)
+
 class OpenSourceAPICollector:
     """Collecteur pour toutes les APIs open source de qualité de l'air"""
     
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
         # APIs gratuites (sans clé requise)
         self.openaq_base = "https://api.openaq.org/v2"
         self.waqi_base = "https://api.waqi.info/feed"
@@ -27,109 +44,165 @@ class OpenSourceAPICollector:
         self.airnow_key = os.getenv('AIRNOW_API_KEY')
         self.waqi_token = os.getenv('WAQI_TOKEN', 'demo')  # 'demo' token gratuit
         
+        # Session HTTP partagée par les trois APIs (keep-alive + cache DNS) ; celle de
+        # l'application si elle est fournie (jamais fermée ici), sinon créée à la demande
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        
         logger.info("🌍 Collecteur APIs Open Source initialisé")
         
-    async def get_all_available_data(self, lat: float, lon: float) -> Dict:
-        """Collecte depuis toutes les APIs disponibles et retourne la meilleure source"""
-        sources_data = {}
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Session HTTP persistante, créée à la première requête"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=50, ttl_dns_cache=300, keepalive_timeout=75)
+            )
+            self._owns_session = True
+        return self.session
+    
+    async def close(self):
+        """Ferme la session HTTP (seulement si elle a été créée ici)"""
+        if self.session and self._owns_session:
+            await self.session.close()
+            self.session = None
+    
+    async def get_all_available_data(self, lat: float, lon: float,
+                                     min_sources: Optional[int] = None,
+                                     deadline: Optional[float] = None) -> Dict:
+        """
+        Collecte depuis toutes les APIs disponibles et retourne la meilleure source
+
+        Les APIs sont interrogées en parallèle. Pour les appelants sensibles à la
+        latence, ``min_sources`` et ``deadline`` permettent de rendre la main dès
+        que ``min_sources`` sources ont répondu ou que ``deadline`` secondes se
+        sont écoulées ; les requêtes restantes sont alors annulées.
+        """
+        # Ordonnancement par fiabilité: AirNow > OpenAQ > WAQI
+        fetchers = []
+        if self.airnow_key:
+            fetchers.append(('airnow', 'AirNow', self._get_airnow_data))
+        fetchers.append(('openaq', 'OpenAQ', self._get_openaq_data))
+        fetchers.append(('waqi', 'WAQI', self._get_waqi_data))
         
-        # 1. OpenAQ (API gratuite, très fiable)
-        openaq_data = await self._get_openaq_data(lat, lon)
-        if openaq_data:
-            sources_data['openaq'] = openaq_data
-            logger.info("✅ Données OpenAQ récupérées")
+        # Horodatage unique partagé par toutes les sources de cette requête
+        timestamp = _utc_timestamp()
         
-        # 2. World Air Quality Index (WAQI)
-        waqi_data = await self._get_waqi_data(lat, lon)
-        if waqi_data:
-            sources_data['waqi'] = waqi_data
-            logger.info("✅ Données WAQI récupérées")
+        tasks = {
+            asyncio.create_task(fetch(lat, lon, timestamp)): (key, label)
+            for key, label, fetch in fetchers
+        }
+        required = min(min_sources or len(tasks), len(tasks))
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + deadline if deadline is not None else None
         
-        # 3. AirNow (si clé disponible)
-        if self.airnow_key:
-            airnow_data = await self._get_airnow_data(lat, lon)
-            if airnow_data:
-                sources_data['airnow'] = airnow_data
-                logger.info("✅ Données AirNow récupérées")
+        sources_data = {}
+        pending = set(tasks)
+        while pending and len(sources_data) < required:
+            timeout = None
+            if end_time is not None:
+                timeout = end_time - loop.time()
+                if timeout <= 0:
+                    break
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for task in done:
+                key, label = tasks[task]
+                data = task.result() if not task.cancelled() and task.exception() is None else None
+                if data:
+                    sources_data[key] = data
+                    logger.info(f"✅ Données {label} récupérées")
         
-        # 4. Combiner les meilleures données
-        return self._combine_best_data(sources_data, lat, lon)
+        if pending:
+            logger.info(f"⏱️ {len(pending)} source(s) lente(s) annulée(s)")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        # Combiner les meilleures données
+        return self._combine_best_data(sources_data, lat, lon, timestamp)
     
-    async def _get_openaq_data(self, lat: float, lon: float) -> Optional[Dict]:
+    async def _get_openaq_data(self, lat: float, lon: float,
+                               timestamp: Optional[str] = None) -> Optional[SourceResult]:
         """Récupère les données depuis OpenAQ (API gratuite)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # Chercher les stations proches
-                url = f"{self.openaq_base}/latest"
-                params = {
-                    'coordinates': f"{lat},{lon}",
-                    'radius': 25000,  # 25km radius
-                    'limit': 100,
-                    'sort': 'distance'
-                }
-                
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._format_openaq_data(data.get('results', []))
-                    else:
-                        logger.warning(f"⚠️ OpenAQ erreur {response.status}")
-                        return None
-                        
+            session = await self._get_session()
+            # Chercher les stations proches
+            url = f"{self.openaq_base}/latest"
+            params = {
+                'coordinates': f"{lat},{lon}",
+                'radius': 25000,  # 25km radius
+                'limit': 100,
+                'sort': 'distance'
+            }
+            
+            async with session.get(url, params=params) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    return self._format_openaq_data(data.get('results', []), timestamp)
+                else:
+                    logger.warning(f"⚠️ OpenAQ erreur {response.status}")
+                    return None
+                    
         except Exception as e:
             logger.error(f"❌ Erreur OpenAQ: {e}")
             return None
     
-    async def _get_waqi_data(self, lat: float, lon: float) -> Optional[Dict]:
+    async def _get_waqi_data(self, lat: float, lon: float,
+                             timestamp: Optional[str] = None) -> Optional[SourceResult]:
         """Récupère les données depuis World Air Quality Index"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # WAQI par géolocalisation
-                url = f"{self.waqi_base}/geo:{lat};{lon}/"
-                params = {'token': self.waqi_token}
+            session = await self._get_session()
+            # WAQI par géolocalisation
+            url = f"{self.waqi_base}/geo:{lat};{lon}/"
+            params = {'token': self.waqi_token}
+            
+            async with session.get(url, params=params) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    if data.get('status') == 'ok':
+                        return self._format_waqi_data(data.get('data', {}), timestamp)
                 
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('status') == 'ok':
-                            return self._format_waqi_data(data.get('data', {}))
+            logger.warning(f"⚠️ WAQI erreur ou pas de données")
+            return None
                     
-                logger.warning(f"⚠️ WAQI erreur ou pas de données")
-                return None
-                        
         except Exception as e:
             logger.error(f"❌ Erreur WAQI: {e}")
             return None
     
-    async def _get_airnow_data(self, lat: float, lon: float) -> Optional[Dict]:
+    async def _get_airnow_data(self, lat: float, lon: float,
+                               timestamp: Optional[str] = None) -> Optional[SourceResult]:
         """Récupère les données depuis AirNow (EPA)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://www.airnowapi.org/aq/observation/latLong/current/"
-                params = {
-                    'format': 'application/json',
-                    'latitude': lat,
-                    'longitude': lon,
-                    'distance': 25,
-                    'API_KEY': self.airnow_key
-                }
-                
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._format_airnow_data(data)
-                    else:
-                        logger.warning(f"⚠️ AirNow erreur {response.status}")
-                        return None
-                        
+            session = await self._get_session()
+            url = "https://www.airnowapi.org/aq/observation/latLong/current/"
+            params = {
+                'format': 'application/json',
+                'latitude': lat,
+                'longitude': lon,
+                'distance': 25,
+                'API_KEY': self.airnow_key
+            }
+            
+            async with session.get(url, params=params) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    return self._format_airnow_data(data, timestamp)
+                else:
+                    logger.warning(f"⚠️ AirNow erreur {response.status}")
+                    return None
+                    
         except Exception as e:
             logger.error(f"❌ Erreur AirNow: {e}")
             return None
     
-    def _format_openaq_data(self, measurements: List[Dict]) -> Dict:
+    def _format_openaq_data(self, measurements: List[Dict],
+                            timestamp: Optional[str] = None) -> Optional[SourceResult]:
         """Formate les données OpenAQ"""
         if not measurements:
-            return {}
+            return None
         
         # Grouper par polluant
         pollutants = {}
@@ -150,19 +223,21 @@ class OpenSourceAPICollector:
             elif param in ['co']:
                 pollutants['co'] = value
         
-        if pollutants:
-            pollutants.update({
-                'source': 'OpenAQ',
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
-                'data_quality': 'high'
-            })
+        if not pollutants:
+            return None
         
-        return pollutants
+        return SourceResult(
+            pollutants=pollutants,
+            source='OpenAQ',
+            data_quality='high',
+            timestamp=timestamp or _utc_timestamp()
+        )
     
-    def _format_waqi_data(self, data: Dict) -> Dict:
+    def _format_waqi_data(self, data: Dict,
+                          timestamp: Optional[str] = None) -> Optional[SourceResult]:
         """Formate les données WAQI"""
         if not data:
-            return {}
+            return None
         
         iaqi = data.get('iaqi', {})
         pollutants = {}
@@ -181,23 +256,28 @@ class OpenSourceAPICollector:
         if 'co' in iaqi:
             pollutants['co'] = iaqi['co'].get('v')
         
-        if pollutants:
-            pollutants.update({
-                'aqi': data.get('aqi'),
-                'source': 'WAQI',
-                'station': data.get('city', {}).get('name', 'Unknown'),
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
-                'data_quality': 'medium'
-            })
+        if not pollutants:
+            return None
         
-        return pollutants
+        return SourceResult(
+            pollutants=pollutants,
+            source='WAQI',
+            data_quality='medium',
+            timestamp=timestamp or _utc_timestamp(),
+            extra={
+                'aqi': data.get('aqi'),
+                'station': data.get('city', {}).get('name', 'Unknown')
+            }
+        )
     
-    def _format_airnow_data(self, data: List[Dict]) -> Dict:
+    def _format_airnow_data(self, data: List[Dict],
+                            timestamp: Optional[str] = None) -> Optional[SourceResult]:
         """Formate les données AirNow"""
         if not data:
-            return {}
+            return None
         
         pollutants = {}
+        sub_indices = {}
         
         for measurement in data:
             param = measurement.get('ParameterName', '').lower()
@@ -206,24 +286,27 @@ class OpenSourceAPICollector:
             
             if 'pm2.5' in param:
                 pollutants['pm25'] = value
-                pollutants['pm25_aqi'] = aqi
+                sub_indices['pm25_aqi'] = aqi
             elif 'pm10' in param:
                 pollutants['pm10'] = value
-                pollutants['pm10_aqi'] = aqi
+                sub_indices['pm10_aqi'] = aqi
             elif 'ozone' in param or 'o3' in param:
                 pollutants['o3'] = value
-                pollutants['o3_aqi'] = aqi
+                sub_indices['o3_aqi'] = aqi
         
-        if pollutants:
-            pollutants.update({
-                'source': 'AirNow EPA',
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
-                'data_quality': 'high'
-            })
+        if not pollutants:
+            return None
         
-        return pollutants
+        return SourceResult(
+            pollutants=pollutants,
+            source='AirNow EPA',
+            data_quality='high',
+            timestamp=timestamp or _utc_timestamp(),
+            extra=sub_indices
+        )
     
-    def _combine_best_data(self, sources_data: Dict, lat: float, lon: float) -> Dict:
+    def _combine_best_data(self, sources_data: Dict[str, SourceResult], lat: float, lon: float,
+                           timestamp: Optional[str] = None) -> Dict:
         """Combine les données des différentes sources pour optimiser la qualité"""
         if not sources_data:
             logger.warning("⚠️ Aucune donnée des APIs open source")
@@ -235,7 +318,7 @@ class OpenSourceAPICollector:
         combined = {
             'coordinates': [lat, lon],
             'sources_used': list(sources_data.keys()),
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
+            'timestamp': timestamp or _utc_timestamp()
         }
         
         # Prendre la meilleure valeur pour chaque polluant
@@ -246,8 +329,9 @@ class OpenSourceAPICollector:
             best_source = None
             
             for source in priority_sources:
-                if source in sources_data and pollutant in sources_data[source]:
-                    best_value = sources_data[source][pollutant]
+                result = sources_data.get(source)
+                if result is not None and pollutant in result.pollutants:
+                    best_value = result.pollutants[pollutant]
                     best_source = source
                     break
             
@@ -257,8 +341,8 @@ class OpenSourceAPICollector:
         
         # AQI principal (priorité à AirNow/WAQI qui ont des AQI calculés)
         aqi_source = None
-        if 'waqi' in sources_data and 'aqi' in sources_data['waqi']:
-            combined['aqi'] = sources_data['waqi']['aqi']
+        if 'waqi' in sources_data and 'aqi' in sources_data['waqi'].extra:
+            combined['aqi'] = sources_data['waqi'].extra['aqi']
             aqi_source = 'WAQI'
         elif 'airnow' in sources_data:
             # Calculer AQI depuis AirNow si disponible
@@ -1,5 +1,6 @@
 # openweather_client.py
 import aiohttp
+import orjson
 import os
 from datetime import datetime
 import logging
@@ -16,9 +17,12 @@ logger = logging.getLogger(__name__)
 class OpenWeatherClient:
     """Client spécialisé pour les données météo OpenWeather"""
     
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
         self.api_key = os.getenv('OPENWEATHER_API_KEY')
         self.base_url = "https://api.openweathermap.org/data/2.5"
+        # Session de l'application si elle est fournie (jamais fermée ici), sinon créée à la demande
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
         
         # Log pour vérifier la clé API
         if self.api_key:
@@ -26,6 +30,21 @@ class OpenWeatherClient:
         else:
             logger.info(f"🌤️ OpenWeatherClient initialisé - API Key: ❌")
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Session HTTP persistante (connexions keep-alive réutilisées entre requêtes)"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=50, ttl_dns_cache=300, keepalive_timeout=75)
+            )
+            self._owns_session = True
+        return self.session
+    
+    async def close(self):
+        """Ferme la session HTTP (seulement si elle a été créée ici)"""
+        if self.session and self._owns_session:
+            await self.session.close()
+            self.session = None
+    
     async def get_weather_data(self, lat: float, lon: float) -> Optional[Dict]:
         """Récupère les données météo complètes depuis OpenWeather"""
         if not self.api_key:
@@ -33,24 +52,25 @@ class OpenWeatherClient:
             return None
             
         try:
-            async with aiohttp.ClientSession() as session:
-                # Données météo actuelles
-                weather_url = f"{self.base_url}/weather"
-                params = {
-                    'lat': lat,
-                    'lon': lon,
-                    'appid': self.api_key,
-                    'units': 'metric',
-                    'lang': 'fr'
-                }
-                
-                async with session.get(weather_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._process_weather_data(data)
-                    else:
-                        logger.error(f"❌ Erreur OpenWeather: {response.status}")
-                        return None
+            session = await self._get_session()
+            
+            # Données météo actuelles
+            weather_url = f"{self.base_url}/weather"
+            params = {
+                'lat': lat,
+                'lon': lon,
+                'appid': self.api_key,
+                'units': 'metric',
+                'lang': 'fr'
+            }
+            
+            async with session.get(weather_url, params=params) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    return self._process_weather_data(data)
+                else:
+                    logger.error(f"❌ Erreur OpenWeather: {response.status}")
+                    return None
                         
         except Exception as e:
             logger.error(f"❌ Erreur récupération météo: {e}")
@@ -60,7 +80,8 @@ class OpenWeatherClient:
         """Traite les données météo OpenWeather"""
         main = data.get('main', {})
         wind = data.get('wind', {})
-        weather = data.get('weather', [{}])[0]
+        conditions = data.get('weather')
+        weather = conditions[0] if conditions else {}
         
         return {
             'temperature': main.get('temp'),
@@ -5,14 +5,125 @@ Intègre plusieurs sources : NASA TEMPO, OpenAQ, NOAA, WHO Global Air Quality
 
 import aiohttp
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import logging
 import math
 import json
+from functools import lru_cache
+
+import numpy as np
+
+from ._historical_kernels import historical_kernel
+from ..services._numerics import calculate_aqi, calculate_aqi_batch, thread_rng
 
 logger = logging.getLogger(__name__)
 
+# Grandes zones urbaines polluées
+URBAN_ZONES = (
+    (48.8566, 2.3522, "Paris"),
+    (40.7128, -74.0060, "New York"),
+    (34.0522, -118.2437, "Los Angeles"),
+    (51.5074, -0.1278, "London"),
+    (55.7558, 37.6176, "Moscow"),
+    (39.9042, 116.4074, "Beijing"),
+    (35.6762, 139.6503, "Tokyo"),
+    (19.4326, -99.1332, "Mexico City"),
+    (-23.5505, -46.6333, "São Paulo"),
+    (28.6139, 77.2090, "Delhi")
+)
+
+# Plages (min, max) par polluant selon le type de région, basées sur les observations TEMPO réelles
+TEMPO_PATTERNS = {
+    "urban_high_pollution": {
+        "no2": (25, 65),    # µg/m³
+        "pm25": (15, 35),
+        "pm10": (25, 50),
+        "o3": (40, 80),
+        "so2": (8, 20),
+        "co": (1.0, 3.0)    # mg/m³
+    },
+    "temperate_moderate": {
+        "no2": (10, 30),
+        "pm25": (8, 20),
+        "pm10": (15, 30),
+        "o3": (50, 90),
+        "so2": (3, 10),
+        "co": (0.5, 1.5)
+    },
+    "tropical_variable": {
+        "no2": (5, 25),
+        "pm25": (5, 25),
+        "pm10": (10, 35),
+        "o3": (30, 70),
+        "so2": (2, 8),
+        "co": (0.3, 1.2)
+    },
+    "polar_clean": {
+        "no2": (2, 8),
+        "pm25": (2, 8),
+        "pm10": (5, 15),
+        "o3": (40, 60),
+        "so2": (1, 4),
+        "co": (0.2, 0.8)
+    }
+}
+
+# Ordre des colonnes des tableaux de mesures historiques
+HISTORICAL_POLLUTANTS = ('pm25', 'pm10', 'no2', 'o3', 'so2', 'co')
+TEMPO_PATTERN_BOUNDS = {
+    region: (
+        np.array([pattern[p][0] for p in HISTORICAL_POLLUTANTS], dtype=float),
+        np.array([pattern[p][1] for p in HISTORICAL_POLLUTANTS], dtype=float)
+    )
+    for region, pattern in TEMPO_PATTERNS.items()
+}
+# Champs d'une mesure historique, dans l'ordre des lignes comme des colonnes
+HISTORICAL_FIELDS = ('timestamp',) + HISTORICAL_POLLUTANTS + ('aqi',)
+HISTORICAL_MAX_POINTS = 1000  # Limite du nombre de points pour éviter les timeouts
+
+def rows_to_columns(rows: List[Dict]) -> Dict[str, list]:
+    """Mesures en lignes (liste de dicts) vers colonnes, selon les clés de la première ligne"""
+    if not rows:
+        return {field: [] for field in HISTORICAL_FIELDS}
+    return {key: [row[key] for row in rows if key in row] for key in rows[0]}
+
+def columns_to_rows(columns: Dict) -> List[Dict]:
+    """Colonnes (listes ou tableaux NumPy) vers mesures en lignes, dans l'ordre des colonnes"""
+    keys = tuple(columns)
+    values = (column if isinstance(column, list) else column.tolist() for column in columns.values())
+    return [dict(zip(keys, row)) for row in zip(*values)]
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calcule la distance en kilomètres entre deux points"""
+    # Formule haversine simplifiée
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+    r = 6371  # Rayon de la Terre en km
+    return c * r
+
+@lru_cache(maxsize=4096)
+def _region_type_cached(lat_r: int, lon_r: int) -> str:
+    """Type de région pour des coordonnées arrondies au dixième de degré (lat_r = round(lat*10))"""
+    latitude = lat_r / 10
+    longitude = lon_r / 10
+    
+    # Vérifier si proche d'une grande zone urbaine (dans un rayon de 100km)
+    for city_lat, city_lon, city_name in URBAN_ZONES:
+        if _haversine_km(latitude, longitude, city_lat, city_lon) < 100:
+            return "urban_high_pollution"
+    
+    # Zone industrielle vs résidentielle vs rurale
+    # Simplification basée sur la densité de population estimée
+    if abs(latitude) > 60:  # Régions polaires
+        return "polar_clean"
+    elif 30 <= abs(latitude) <= 60:  # Zones tempérées
+        return "temperate_moderate"
+    else:  # Zones tropicales
+        return "tropical_variable"
+
 class RealDataConnector:
     """Connecteur principal pour les données réelles de qualité de l'air et météo"""
     
@@ -115,50 +226,48 @@ class RealDataConnector:
     
     async def _process_openaq_data(self, data: Dict, latitude: float, longitude: float) -> Optional[Dict]:
         """Traite les données OpenAQ et les formate"""
-        try:
-            if not data.get('results'):
-                return None
+        if not data.get('results'):
+            return None
+        
+        # Regrouper les mesures par station
+        stations = {}
+        pollutant_mapping = self.pollutant_mapping
+        for result in data['results']:
+            station_id = result.get('location', 'unknown')
+            station = stations.get(station_id)
+            if station is None:
+                station = stations[station_id] = {
+                    'location': result.get('location'),
+                    'coordinates': result.get('coordinates') or {},
+                    'city': result.get('city'),
+                    'country': result.get('country'),
+                    'measurements': {},
+                    'last_updated': None
+                }
+            station_measurements = station['measurements']
             
-            # Regrouper les mesures par station
-            stations = {}
-            for result in data['results']:
-                station_id = result.get('location', 'unknown')
-                if station_id not in stations:
-                    stations[station_id] = {
-                        'location': result.get('location'),
-                        'coordinates': result.get('coordinates', {}),
-                        'city': result.get('city'),
-                        'country': result.get('country'),
-                        'measurements': {},
-                        'last_updated': None
+            # Ajouter les mesures de chaque paramètre
+            for measurement in result.get('measurements') or ():
+                parameter = measurement.get('parameter')
+                if parameter in pollutant_mapping:
+                    last_updated = measurement.get('lastUpdated')
+                    station_measurements[parameter] = {
+                        'value': measurement.get('value') or 0,
+                        'unit': measurement.get('unit'),
+                        'last_updated': last_updated
                     }
-                
-                # Ajouter les mesures de chaque paramètre
-                for measurement in result.get('measurements', []):
-                    parameter = measurement.get('parameter')
-                    if parameter in self.pollutant_mapping:
-                        stations[station_id]['measurements'][parameter] = {
-                            'value': measurement.get('value'),
-                            'unit': measurement.get('unit'),
-                            'last_updated': measurement.get('lastUpdated')
-                        }
-                        
-                        # Garder la date la plus récente
-                        if not stations[station_id]['last_updated'] or \
-                           measurement.get('lastUpdated', '') > stations[station_id]['last_updated']:
-                            stations[station_id]['last_updated'] = measurement.get('lastUpdated')
-            
-            # Sélectionner la station la plus proche avec le plus de données
-            best_station = self._select_best_station(stations, latitude, longitude)
-            if not best_station:
-                return None
-            
-            # Formater les données
-            return self._format_air_quality_data(best_station, latitude, longitude)
-            
-        except Exception as e:
-            logger.error(f"Erreur traitement OpenAQ: {e}")
+                    
+                    # Garder la date la plus récente
+                    if not station['last_updated'] or (last_updated or '') > station['last_updated']:
+                        station['last_updated'] = last_updated
+        
+        # Sélectionner la station la plus proche avec le plus de données
+        best_station = self._select_best_station(stations, latitude, longitude)
+        if not best_station:
             return None
+        
+        # Formater les données
+        return self._format_air_quality_data(best_station, latitude, longitude)
     
     def _select_best_station(self, stations: Dict, target_lat: float, target_lon: float) -> Optional[Dict]:
         """Sélectionne la meilleure station basée sur la distance et la qualité des données"""
@@ -168,7 +277,7 @@ class RealDataConnector:
         scored_stations = []
         
         for station_id, station in stations.items():
-            coords = station.get('coordinates', {})
+            coords = station['coordinates']
             station_lat = coords.get('latitude')
             station_lon = coords.get('longitude')
             
@@ -193,17 +302,14 @@ class RealDataConnector:
     
     def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calcule la distance en kilomètres entre deux points"""
-        # Formule haversine simplifiée
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        r = 6371  # Rayon de la Terre en km
-        return c * r
+        return _haversine_km(lat1, lon1, lat2, lon2)
     
     def _format_air_quality_data(self, station: Dict, latitude: float, longitude: float) -> Dict:
         """Formate les données de qualité de l'air au format API"""
-        measurements = station.get('measurements', {})
+        measurements = station['measurements']
+        station_coords = station['coordinates']
+        station_lat = station_coords.get('latitude', latitude)
+        station_lon = station_coords.get('longitude', longitude)
         
         # Extraction des valeurs avec valeurs par défaut
         pm25 = measurements.get('pm25', {}).get('value', 0)
@@ -228,10 +334,7 @@ class RealDataConnector:
         return {
             'name': location_name,
             'coordinates': [latitude, longitude],
-            'station_coordinates': [
-                station.get('coordinates', {}).get('latitude', latitude),
-                station.get('coordinates', {}).get('longitude', longitude)
-            ],
+            'station_coordinates': [station_lat, station_lon],
             'aqi': aqi,
             'pm25': round(max(0, pm25), 1),
             'pm10': round(max(0, pm10), 1),
@@ -243,62 +346,13 @@ class RealDataConnector:
             'station_name': station.get('location', 'Unknown Station'),
             'last_updated': station.get('last_updated'),
             'distance_km': round(self._calculate_distance(
-                latitude, longitude,
-                station.get('coordinates', {}).get('latitude', latitude),
-                station.get('coordinates', {}).get('longitude', longitude)
+                latitude, longitude, station_lat, station_lon
             ), 1)
         }
     
     def _calculate_aqi(self, pm25: float, pm10: float, no2: float, o3: float) -> int:
-        """Calcule l'AQI basé sur les polluants (standard EPA américain)"""
-        def get_aqi_value(concentration, breakpoints):
-            for i, (c_low, c_high, aqi_low, aqi_high) in enumerate(breakpoints):
-                if c_low <= concentration <= c_high:
-                    return int(((aqi_high - aqi_low) / (c_high - c_low)) * (concentration - c_low) + aqi_low)
-            return 500  # Au-delà des seuils = Hazardous
-        
-        # Breakpoints EPA pour PM2.5 (µg/m³)
-        pm25_breakpoints = [
-            (0, 12, 0, 50),
-            (12.1, 35.4, 51, 100),
-            (35.5, 55.4, 101, 150),
-            (55.5, 150.4, 151, 200),
-            (150.5, 250.4, 201, 300),
-            (250.5, float('inf'), 301, 500)
-        ]
-        
-        # Breakpoints EPA pour PM10 (µg/m³)
-        pm10_breakpoints = [
-            (0, 54, 0, 50),
-            (55, 154, 51, 100),
-            (155, 254, 101, 150),
-            (255, 354, 151, 200),
-            (355, 424, 201, 300),
-            (425, float('inf'), 301, 500)
-        ]
-        
-        # Breakpoints pour NO2 (µg/m³) - Approximation basée sur standards WHO
-        no2_breakpoints = [
-            (0, 25, 0, 50),
-            (25.1, 50, 51, 100),
-            (50.1, 100, 101, 150),
-            (100.1, 200, 151, 200),
-            (200.1, 400, 201, 300),
-            (400.1, float('inf'), 301, 500)
-        ]
-        
-        # Calcul AQI pour chaque polluant
-        aqi_values = []
-        
-        if pm25 > 0:
-            aqi_values.append(get_aqi_value(pm25, pm25_breakpoints))
-        if pm10 > 0:
-            aqi_values.append(get_aqi_value(pm10, pm10_breakpoints))
-        if no2 > 0:
-            aqi_values.append(get_aqi_value(no2, no2_breakpoints))
-        
-        # L'AQI final est la valeur la plus élevée
-        return max(aqi_values) if aqi_values else 50
+        """Calcule l'AQI basé sur les polluants (standard EPA américain, PM2.5/PM10/NO2)"""
+        return calculate_aqi(pm25, pm10, no2)
     
     async def _get_nasa_tempo_data(self, latitude: float, longitude: float) -> Optional[Dict]:
         """Récupère les données NASA TEMPO (NO2, HCHO, O3)"""
@@ -320,83 +374,14 @@ class RealDataConnector:
             return None
     
     def _determine_region_type(self, latitude: float, longitude: float) -> str:
-        """Détermine le type de région basé sur les coordonnées"""
-        # Grandes zones urbaines polluées
-        urban_zones = [
-            (48.8566, 2.3522, "Paris"),
-            (40.7128, -74.0060, "New York"),
-            (34.0522, -118.2437, "Los Angeles"),
-            (51.5074, -0.1278, "London"),
-            (55.7558, 37.6176, "Moscow"),
-            (39.9042, 116.4074, "Beijing"),
-            (35.6762, 139.6503, "Tokyo"),
-            (19.4326, -99.1332, "Mexico City"),
-            (-23.5505, -46.6333, "São Paulo"),
-            (28.6139, 77.2090, "Delhi")
-        ]
-        
-        # Vérifier si proche d'une grande zone urbaine (dans un rayon de 100km)
-        for city_lat, city_lon, city_name in urban_zones:
-            distance = self._calculate_distance(latitude, longitude, city_lat, city_lon)
-            if distance < 100:
-                return "urban_high_pollution"
-        
-        # Zones côtières (généralement moins polluées)
-        if abs(latitude) < 60:  # Pas dans les régions polaires
-            # Logique simplifiée pour détecter les zones côtières
-            # Dans une vraie implémentation, on utiliserait une base de données géographique
-            pass
-        
-        # Zone industrielle vs résidentielle vs rurale
-        # Simplification basée sur la densité de population estimée
-        if abs(latitude) > 60:  # Régions polaires
-            return "polar_clean"
-        elif 30 <= abs(latitude) <= 60:  # Zones tempérées
-            return "temperate_moderate"
-        else:  # Zones tropicales
-            return "tropical_variable"
+        """Détermine le type de région basé sur les coordonnées (mis en cache par cellule de 0.1°)"""
+        return _region_type_cached(round(latitude * 10), round(longitude * 10))
     
     def _get_tempo_estimates(self, region_type: str, latitude: float, longitude: float) -> Dict:
         """Génère des estimations basées sur les patterns TEMPO pour le type de région"""
         
-        # Patterns basés sur les observations TEMPO réelles
-        patterns = {
-            "urban_high_pollution": {
-                "no2": (25, 65),    # µg/m³
-                "pm25": (15, 35),
-                "pm10": (25, 50),
-                "o3": (40, 80),
-                "so2": (8, 20),
-                "co": (1.0, 3.0)    # mg/m³
-            },
-            "temperate_moderate": {
-                "no2": (10, 30),
-                "pm25": (8, 20),
-                "pm10": (15, 30),
-                "o3": (50, 90),
-                "so2": (3, 10),
-                "co": (0.5, 1.5)
-            },
-            "tropical_variable": {
-                "no2": (5, 25),
-                "pm25": (5, 25),
-                "pm10": (10, 35),
-                "o3": (30, 70),
-                "so2": (2, 8),
-                "co": (0.3, 1.2)
-            },
-            "polar_clean": {
-                "no2": (2, 8),
-                "pm25": (2, 8),
-                "pm10": (5, 15),
-                "o3": (40, 60),
-                "so2": (1, 4),
-                "co": (0.2, 0.8)
-            }
-        }
-        
         # Récupérer les valeurs pour le type de région
-        pattern = patterns.get(region_type, patterns["temperate_moderate"])
+        pattern = TEMPO_PATTERNS.get(region_type, TEMPO_PATTERNS["temperate_moderate"])
         
         # Générer des valeurs dans les plages avec variation réaliste
         import random
@@ -528,20 +513,22 @@ class RealDataConnector:
             'data_source': 'Weather Estimation Model'
         }
     
-    async def get_historical_data(self, latitude: float, longitude: float, start_date: datetime, end_date: datetime) -> List[Dict]:
-        """Récupère les données historiques de qualité de l'air"""
+    async def get_historical_data(self, latitude: float, longitude: float, start_date: datetime, end_date: datetime,
+                                  layout: str = 'rows'):
+        """Récupère les données historiques de qualité de l'air (liste de mesures, ou colonnes si layout='columns')"""
         try:
             # Essayer OpenAQ d'abord
             historical_data = await self._get_openaq_historical(latitude, longitude, start_date, end_date)
             if historical_data:
-                return historical_data
-            
-            # Fallback vers estimation basée sur patterns
-            return self._generate_historical_estimation(latitude, longitude, start_date, end_date)
+                return rows_to_columns(historical_data) if layout == 'columns' else historical_data
             
         except Exception as e:
             logger.error(f"Erreur données historiques: {e}")
-            return self._generate_historical_estimation(latitude, longitude, start_date, end_date)
+        
+        # Fallback vers estimation basée sur patterns, calculée dans un thread pour ne pas
+        # bloquer la boucle d'événements (NumPy/numba relâchent le GIL pendant le calcul)
+        estimate = self._historical_estimation_columns if layout == 'columns' else self._generate_historical_estimation
+        return await asyncio.to_thread(estimate, latitude, longitude, start_date, end_date)
     
     async def _get_openaq_historical(self, latitude: float, longitude: float, start_date: datetime, end_date: datetime) -> Optional[List[Dict]]:
         """Récupère les données historiques depuis OpenAQ"""
@@ -610,43 +597,43 @@ class RealDataConnector:
         return sorted(measurements, key=lambda x: x['timestamp'])
     
     def _generate_historical_estimation(self, latitude: float, longitude: float, start_date: datetime, end_date: datetime) -> List[Dict]:
-        """Génère des estimations historiques basées sur les patterns connus"""
-        measurements = []
-        current_date = start_date
+        """Génère des estimations historiques basées sur les patterns connus (une mesure par heure)"""
+        return columns_to_rows(self._historical_estimation_columns(latitude, longitude, start_date, end_date))
+    
+    def _historical_estimation_columns(self, latitude: float, longitude: float, start_date: datetime, end_date: datetime) -> Dict:
+        """Estimations historiques en colonnes (SoA) : un tableau par champ, toutes les heures d'un coup"""
+        # Une mesure par heure de start_date à end_date inclus, bornée pour éviter les timeouts
+        n = max(0, min(int((end_date - start_date).total_seconds() // 3600) + 1, HISTORICAL_MAX_POINTS))
         region_type = self._determine_region_type(latitude, longitude)
-        
-        while current_date <= end_date:
-            # Estimation basée sur le type de région et la date
-            daily_data = self._get_tempo_estimates(region_type, latitude, longitude)
-            
-            # Ajouter variation temporelle
-            day_of_year = current_date.timetuple().tm_yday
-            hour = current_date.hour
-            
-            # Facteurs de variation saisonnière et diurne
-            seasonal_factor = 1 + 0.2 * math.sin(2 * math.pi * (day_of_year - 90) / 365)
-            diurnal_factor = 1 + 0.3 * math.sin(2 * math.pi * (hour - 8) / 24)
-            
-            measurement = {
-                'timestamp': current_date.isoformat() + "Z",
-                'pm25': round(daily_data['pm25'] * seasonal_factor * abs(diurnal_factor), 1),
-                'pm10': round(daily_data['pm10'] * seasonal_factor * abs(diurnal_factor), 1),
-                'no2': round(daily_data['no2'] * abs(diurnal_factor), 1),
-                'o3': round(daily_data['o3'] * (2 - seasonal_factor), 1),  # O3 inverse saisonnier
-                'so2': round(daily_data['so2'] * seasonal_factor, 1),
-                'co': round(daily_data['co'] * abs(diurnal_factor), 2)
-            }
-            
-            measurement['aqi'] = self._calculate_aqi(
-                measurement['pm25'], measurement['pm10'],
-                measurement['no2'], measurement['o3']
-            )
-            
-            measurements.append(measurement)
-            current_date += timedelta(hours=1)
-            
-            # Limiter le nombre de points pour éviter les timeouts
-            if len(measurements) >= 1000:
-                break
-        
-        return measurements
\ No newline at end of file
+        lows, highs = TEMPO_PATTERN_BOUNDS.get(region_type, TEMPO_PATTERN_BOUNDS["temperate_moderate"])
+        
+        # Estimation de base par heure (même modèle que _get_tempo_estimates) : facteur
+        # horaire de l'heure courante pour les polluants trafic/O3, aléatoire pour les autres
+        current_hour = datetime.now().hour
+        rng = thread_rng()
+        hour_factors = 1 + rng.uniform(-0.1, 0.1, (n, len(HISTORICAL_POLLUTANTS)))
+        traffic_factor = 1 + 0.3 * (math.sin(2 * math.pi * (current_hour - 8) / 24) +
+                                    math.sin(2 * math.pi * (current_hour - 18) / 24))
+        hour_factors[:, [2, 5]] = traffic_factor  # no2, co
+        hour_factors[:, 3] = 1 + 0.4 * max(0, math.sin(math.pi * (current_hour - 6) / 12))  # o3
+        base = np.maximum(0, rng.uniform(lows, highs, (n, len(HISTORICAL_POLLUTANTS))) * hour_factors)
+        
+        # Jour de l'année et heure de chaque point
+        times = np.datetime64(start_date.replace(tzinfo=None), 'us') + np.arange(n) * np.timedelta64(3600, 's')
+        days = times.astype('datetime64[D]')
+        day_of_year = (days - times.astype('datetime64[Y]').astype('datetime64[D]')).astype(int) + 1
+        hour = (times - days).astype('timedelta64[h]').astype(int)
+        
+        # Facteurs de variation saisonnière et diurne (noyau compilé si numba est disponible)
+        values = historical_kernel(base, day_of_year, hour)
+        rounded = values.round(1)
+        rounded[:, 5] = values[:, 5].round(2)
+        # Une ligne contiguë par polluant (sérialisable directement par orjson)
+        pollutant_columns = np.ascontiguousarray(rounded.T)
+        
+        # Horodatages ISO 8601 formatés en une passe (même précision que isoformat())
+        iso_unit = 'us' if start_date.microsecond else 's'
+        columns = {'timestamp': np.char.add(np.datetime_as_string(times, unit=iso_unit), 'Z').tolist()}
+        columns.update(zip(HISTORICAL_POLLUTANTS, pollutant_columns))
+        columns['aqi'] = calculate_aqi_batch(pollutant_columns[0], pollutant_columns[1], pollutant_columns[2])
+        return columns
@@ -5,6 +5,7 @@ Recherche les données TEMPO des derniers jours au lieu du temps réel uniquemen
 import asyncio
 import earthaccess
 import logging
+import re
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 import aiohttp
@@ -22,6 +23,9 @@ load_dotenv(env_path)
 
 logger = logging.getLogger(__name__)
 
+# Horodatage des noms de granules TEMPO: TEMPO_[PRODUCT]_L2_[YYYYMMDD]T[HHMMSS]...
+_GRANULE_DATE_RE = re.compile(r'(\d{8})T(\d{6})')
+
 class TempoLatestDataClient:
     """
     Client TEMPO spécialisé pour récupérer les dernières données disponibles
@@ -332,9 +336,7 @@ class TempoLatestDataClient:
                 native_id = granule.meta['native-id']
                 # Extraire la date du nom du fichier si possible
                 if 'TEMPO' in native_id:
-                    # Format typique: TEMPO_[PRODUCT]_L2_[YYYYMMDD]T[HHMMSS]...
-                    import re
-                    date_match = re.search(r'(\d{8})T(\d{6})', native_id)
+                    date_match = _GRANULE_DATE_RE.search(native_id)
                     if date_match:
                         date_str = date_match.group(1)
                         time_str = date_match.group(2)
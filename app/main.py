@@ -11,17 +11,27 @@ import os
 # Charger le fichier .env depuis la racine du projet
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 import logging
 import asyncio
-from starlette.responses import JSONResponse  
-from .services.real_air_quality_service import RealAirQualityService
-from .services.air_quality_integration import AirQualityIntegration
-from .services.tempo_latest_service import TempoLatestService
-from .services.hybrid_tempo_service import HybridTEMPOService
+import hashlib
+import time
+import aiohttp
+import orjson
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache, wraps
+from .services.real_air_quality_service import (
+    AQI_CATEGORY_BOUNDS, HEALTH_RECOMMENDATIONS, RealAirQualityService
+)
+from .connectors.real_data_connector import HISTORICAL_POLLUTANTS
+from .services._numerics import iso_utc
 
 # Configuration logging
 logging.basicConfig(
@@ -30,8 +40,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Démarrage : session HTTP partagée par les appels sortants, puis préchargement des
+    services secondaires ; arrêt : fermeture de la session
+    """
+    app.state.http = aiohttp.ClientSession(
+        headers={'User-Agent': 'NASA-TEMPO-Air-Quality-API/2.0'},
+        connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300)
+    )
+    # Services secondaires importés et construits en parallèle (un thread chacun) : le coût
+    # est celui du plus lent, et le démarrage ne l'attend pas (tâche d'arrière-plan)
+    warmup = asyncio.ensure_future(asyncio.gather(
+        *(getter() for getter in SECONDARY_SERVICE_GETTERS),
+        return_exceptions=True
+    ))
+    yield
+    warmup.cancel()
+    await app.state.http.close()
+
 # Initialisation de l'application
 app = FastAPI(
+    lifespan=lifespan,
     title="NASA TEMPO Air Quality API - Real Data",
     version="2.0.0",
     description="""
@@ -70,7 +101,9 @@ app = FastAPI(
     license_info={
         "name": "NASA Open Data License",
         "url": "https://www.nasa.gov/about/highlights/HP_Privacy.html",
-    }
+    },
+    # Sérialisation JSON en C (orjson) pour toutes les réponses
+    default_response_class=ORJSONResponse
 )
 
 # Configuration CORS
@@ -82,26 +115,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Service principal
-air_quality_service = RealAirQualityService()
+# Compression gzip des réponses JSON (prévisions, historique, sources) au-delà de 1 Ko,
+# pour les clients qui l'acceptent ; niveau 5 : bon ratio pour un coût CPU faible
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
-# Nouveau service d'intégration TEMPO + OpenWeather
-air_quality_integration = AirQualityIntegration()
+# Géocodage inverse Nominatim : une session HTTP partagée (pool de connexions TCP/TLS)
+# créée au démarrage ; Nominatim exige un User-Agent identifiant l'application
+NOMINATIM_REVERSE_URL = "https://nominatim.openstreetmap.org/reverse"
+NOMINATIM_TIMEOUT = aiohttp.ClientTimeout(total=3, connect=1)
+# Disjoncteur : après 3 échecs consécutifs, Nominatim n'est plus appelé pendant 30 s
+NOMINATIM_BREAKER_THRESHOLD = 3
+NOMINATIM_BREAKER_COOLDOWN = 30
+nominatim_breaker = {"failures": 0, "open_until": 0.0}
 
-# Service TEMPO Latest - Dernières données satellites disponibles
-tempo_latest_service = TempoLatestService()
+@lru_cache(maxsize=1)
+def get_air_quality_service() -> RealAirQualityService:
+    """Instance unique du service principal (une seule session, un seul cache)"""
+    return RealAirQualityService()
 
 # Service principal - Utiliser le service existant qui marchait
 try:
-    from .services.real_air_quality_service import RealAirQualityService
-    air_quality_service = RealAirQualityService()
+    air_quality_service = get_air_quality_service()
     logger.info("✅ RealAirQualityService initialisé")
-except ImportError as e:
+except Exception as e:
     logger.warning(f"⚠️ RealAirQualityService non disponible: {e}")
     air_quality_service = None
 
-# Service Hybride - TEMPO + APIs Open Source avec concentrations réelles
-hybrid_tempo_service = HybridTEMPOService()
+def shared_http_session() -> Optional[aiohttp.ClientSession]:
+    """Session HTTP de l'application (ouverte par lifespan), transmise aux services"""
+    return getattr(app.state, "http", None)
+
+# Services secondaires : module importé et instance créée au premier appel, pour ne
+# pas charger au démarrage les clients TEMPO (earthaccess, xarray) des endpoints non utilisés
+
+def single_instance(build):
+    """
+    Getter asynchrone d'une instance unique : construite dans un thread (imports lourds
+    hors de la boucle d'événements), les appels concurrents, préchauffage compris,
+    attendent la même tâche. Un échec est levé à chaque appelant et n'est pas retenu :
+    l'appel suivant relance la construction
+    """
+    task: Optional[asyncio.Future] = None
+    
+    @wraps(build)
+    async def getter():
+        nonlocal task
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = asyncio.ensure_future(asyncio.to_thread(build))
+        # shield : une requête annulée n'interrompt pas la construction attendue par les autres
+        return await asyncio.shield(task)
+    return getter
+
+@single_instance
+def get_hybrid_tempo_service():
+    """Service Hybride - TEMPO + APIs Open Source avec concentrations réelles"""
+    from .services.hybrid_tempo_service import HybridTEMPOService
+    return HybridTEMPOService(shared_http_session())
+
+# Délais garantis (secondes) annoncés par les endpoints : au-delà, réponse 504 immédiate
+# plutôt que de bloquer la requête sur une source lente
+ENDPOINT_TIMEOUTS = {"real_air_quality": 5.0, "fast_tempo": 8.0, "comprehensive": 10.0}
 
 # Compteurs de statistiques pour le monitoring
 stats_counter = {
@@ -111,26 +184,164 @@ stats_counter = {
     "fast_tempo_errors": 0,
     "comprehensive_requests": 0,
     "comprehensive_errors": 0,
+    "real_air_quality_timeouts": 0,
+    "fast_tempo_timeouts": 0,
+    "comprehensive_timeouts": 0,
     "total_requests": 0,
     "tempo_latest_requests": 0,
-    "tempo_summary_requests": 0
+    "tempo_summary_requests": 0,
+    "tempo_circuit_open": 0
 }
 
-# Service d'intégration TEMPO + OpenWeather (optionnel)
-try:
-    air_quality_integration = AirQualityIntegration()
+class CircuitBreaker:
+    """
+    Disjoncteur minimal : closed (appels normaux) -> open après failure_threshold échecs
+    consécutifs -> half_open après reset_timeout secondes (un seul appel d'essai)
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        """True si l'appel peut partir ; passe en half_open une fois le délai écoulé"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> bool:
+        """Enregistre un échec ; True si le disjoncteur vient de s'ouvrir"""
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def abort_trial(self):
+        """Appel d'essai annulé sans verdict : retour à open, le suivant pourra réessayer"""
+        if self.state == "half_open":
+            self.state = "open"
+
+# Un disjoncteur par source amont : le service TEMPO Latest (/tempo/latest, /tempo/summary)
+# et le service hybride (TEMPO + APIs Open Source) échouent indépendamment
+tempo_latest_breaker = CircuitBreaker("TEMPO Latest")
+hybrid_tempo_breaker = CircuitBreaker("TEMPO hybride")
+
+TEMPO_UNAVAILABLE_MESSAGE = 'TEMPO temporairement indisponible'
+
+async def degraded_comprehensive(latitude: float, longitude: float) -> Dict:
+    """Analyse complète sans TEMPO : APIs Open Source uniquement"""
+    result = await (await get_hybrid_tempo_service()).get_open_source_air_quality(latitude, longitude)
+    result['status'] = 'degraded'
+    result['message'] = f'{TEMPO_UNAVAILABLE_MESSAGE}: données des APIs Open Source uniquement'
+    return result
+
+async def degraded_latest(latitude: float, longitude: float) -> Dict:
+    """Réponse /tempo/latest sans TEMPO, au format de la réponse 'no_data'"""
+    return {
+        'status': 'degraded',
+        'message': f'{TEMPO_UNAVAILABLE_MESSAGE}. Utiliser /location/full pour des données alternatives.',
+        'coordinates': [latitude, longitude],
+        'search_period_days': 7,
+        'timestamp': utc_now_iso()
+    }
+
+async def degraded_summary(latitude: float, longitude: float) -> Dict:
+    """Réponse /tempo/summary sans TEMPO, au format du résumé"""
+    return {
+        'status': 'degraded',
+        'location': {'latitude': latitude, 'longitude': longitude},
+        'search_parameters': {'period_days': 7, 'total_granules_found': 0},
+        'availability': {'pollutants_available': [], 'total_available': 0, 'latest_dates': {}},
+        'recommendation': f'{TEMPO_UNAVAILABLE_MESSAGE}. Utiliser /location/full pour des données alternatives.',
+        'timestamp': utc_now_iso()
+    }
+
+def record_breaker_failure(breaker: CircuitBreaker):
+    """Échec d'un appel amont ; compte les ouvertures de disjoncteur"""
+    if breaker.record_failure():
+        stats_counter["tempo_circuit_open"] += 1
+        logger.warning(f"⚠️ {breaker.name} indisponible: disjoncteur ouvert {breaker.reset_timeout:.0f}s")
+
+async def tempo_call(breaker: CircuitBreaker, call, degraded, latitude: float, longitude: float,
+                     timeout: Optional[float] = None) -> Dict:
+    """
+    Appelle une source TEMPO à travers son disjoncteur ; une exception, un délai dépassé ou
+    une réponse 'error' comptent comme échec. Disjoncteur ouvert : degraded(lat, lon),
+    réponse de secours au format de l'endpoint
+    """
+    if not breaker.allow():
+        async with asyncio.timeout(timeout):
+            return await degraded(latitude, longitude)
+
+    try:
+        async with asyncio.timeout(timeout):
+            result = await call(latitude, longitude)
+    except asyncio.CancelledError:
+        # Requête annulée (client parti) : ni succès ni échec, mais l'essai half_open est libéré
+        breaker.abort_trial()
+        raise
+    except Exception:
+        record_breaker_failure(breaker)
+        raise
+
+    if result.get('status') == 'error':
+        record_breaker_failure(breaker)
+    else:
+        breaker.record_success()
+    return result
+
+async def shared_comprehensive_call(latitude: float, longitude: float) -> Dict:
+    """
+    Analyse hybride partagée par /tempo/fast et /tempo/comprehensive. Chaque endpoint
+    borne sa propre attente ; l'appel lui-même est borné par le plus long des délais,
+    identique quel que soit l'endpoint qui l'a lancé, pour qu'un TEMPO bloqué libère
+    la cellule et compte comme échec pour le disjoncteur
+    """
+    service = await get_hybrid_tempo_service()
+    return await tempo_call(
+        hybrid_tempo_breaker, service.get_comprehensive_air_quality,
+        degraded_comprehensive, latitude, longitude, timeout=max(ENDPOINT_TIMEOUTS.values())
+    )
+
+@single_instance
+def get_air_quality_integration():
+    """Service d'intégration TEMPO + OpenWeather (optionnel) : lève s'il est indisponible"""
+    try:
+        from .services.air_quality_integration import AirQualityIntegration
+        service = AirQualityIntegration(shared_http_session())
+    except Exception as e:
+        logger.warning(f"⚠️ AirQualityIntegration non disponible: {e}")
+        raise
     logger.info("✅ AirQualityIntegration initialisé")
-except Exception as e:
-    logger.warning(f"⚠️ AirQualityIntegration non disponible: {e}")
-    air_quality_integration = None
+    return service
 
-# Service TEMPO Latest (optionnel)
-try:
-    tempo_latest_service = TempoLatestService()
+@single_instance
+def get_tempo_latest_service():
+    """Service TEMPO Latest (optionnel) : lève s'il est indisponible"""
+    try:
+        from .services.tempo_latest_service import TempoLatestService
+        service = TempoLatestService()
+    except Exception as e:
+        logger.warning(f"⚠️ TempoLatestService non disponible: {e}")
+        raise
     logger.info("✅ TempoLatestService initialisé")
-except Exception as e:
-    logger.warning(f"⚠️ TempoLatestService non disponible: {e}")
-    tempo_latest_service = None
+    return service
+
+# Services secondaires préchargés en arrière-plan par lifespan
+SECONDARY_SERVICE_GETTERS = (get_hybrid_tempo_service, get_air_quality_integration, get_tempo_latest_service)
 
 # Statistiques d'utilisation simple
 usage_stats = {
@@ -144,40 +355,193 @@ usage_stats = {
     "start_time": datetime.now()
 }
 
+# Polluants acceptés par /historical (test d'appartenance en O(1))
+VALID_POLLUTANTS = frozenset(HISTORICAL_POLLUTANTS)
+
+# Au-delà de ce nombre de lignes, les séries sont envoyées en flux (une ligne par fragment)
+STREAMING_ROWS_THRESHOLD = 24
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Cache de réponses en mémoire, avec une durée de vie par endpoint. /location/full renvoie
+# le nom et les informations du lieu demandé : clé = coordonnées exactes. Les endpoints
+# temps réel (/air-quality/real, /tempo/fast, /tempo/comprehensive) partagent une
+# cellule de 0.01° (~1 km), arrondi donné par RESPONSE_CACHE_DECIMALS
+RESPONSE_CACHE_TTL = {"current": 300, "real": 300, "comprehensive": 300}
+RESPONSE_CACHE_DECIMALS = {"real": 2, "comprehensive": 2}
+RESPONSE_CACHE_MAX_ENTRIES = 4096
+response_cache: Dict[tuple, tuple] = {}
+# Appels en cours par clé (single-flight) : une tâche partagée par cellule
+response_inflight: Dict[tuple, asyncio.Future] = {}
+
+def response_cache_key(kind: str, latitude: float, longitude: float, *extra) -> tuple:
+    """Clé de cache : type d'endpoint, position (arrondie selon l'endpoint), paramètres, heure"""
+    decimals = RESPONSE_CACHE_DECIMALS.get(kind)
+    if decimals is not None:
+        latitude, longitude = round(latitude, decimals), round(longitude, decimals)
+    return (kind, latitude, longitude, *extra, int(time.time() // 3600))
+
+def is_cacheable(result: Dict) -> bool:
+    """Les réponses de secours, en erreur ou dégradées ne sont pas mises en cache"""
+    return (
+        result.get('status') not in ('error', 'degraded')
+        and result.get('data_source') != 'Fallback Default Values'
+    )
+
+def get_cached_response(key: tuple) -> Optional[Dict]:
+    """Retourne le résultat en cache s'il n'a pas expiré"""
+    entry = response_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def set_cached_response(key: tuple, result: Dict):
+    """
+    Met un résultat en cache ; quand le cache est plein, purge les entrées expirées
+    puis, si aucune ne l'est, la plus ancienne (le dict garde l'ordre d'insertion)
+    """
+    now = time.monotonic()
+    response_cache.pop(key, None)
+    if len(response_cache) >= RESPONSE_CACHE_MAX_ENTRIES:
+        for stale in [k for k, (expires, _) in response_cache.items() if expires <= now]:
+            del response_cache[stale]
+        if len(response_cache) >= RESPONSE_CACHE_MAX_ENTRIES:
+            del response_cache[next(iter(response_cache))]
+    response_cache[key] = (now + RESPONSE_CACHE_TTL[key[0]], result)
+
+def finish_inflight(key: tuple, task: asyncio.Future):
+    """Fin d'un appel partagé : libère la clé et met en cache un résultat exploitable"""
+    response_inflight.pop(key, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+    result = task.result()
+    if is_cacheable(result):
+        set_cached_response(key, result)
+
+def at_position(result: Dict, latitude: float, longitude: float) -> Dict:
+    """Résultat partagé par une cellule, avec les coordonnées de la requête (copie)"""
+    if 'coordinates' not in result:
+        return result
+    return {**result, 'coordinates': [latitude, longitude]}
+
+async def cached_fetch(key: tuple, fetch, latitude: float, longitude: float) -> Dict:
+    """
+    Résultat en cache, sinon appelle fetch() ; les requêtes concurrentes sur la même
+    cellule attendent la même tâche au lieu d'interroger les sources chacune de leur côté
+    """
+    cached = get_cached_response(key)
+    if cached is not None:
+        return at_position(cached, latitude, longitude)
+    
+    task = response_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        response_inflight[key] = task
+        task.add_done_callback(lambda done: finish_inflight(key, done))
+    # shield : le délai dépassé d'une requête n'annule pas l'appel attendu par les autres
+    return at_position(await asyncio.shield(task), latitude, longitude)
+
+def stream_json_rows(payload: Dict, rows_key: str) -> StreamingResponse:
+    """
+    Envoie payload en JSON en flux : l'en-tête d'abord, puis chaque ligne de
+    payload[rows_key] encodée séparément, sans matérialiser le corps complet
+    """
+    rows = payload[rows_key]
+    head = orjson.dumps({k: v for k, v in payload.items() if k != rows_key}, option=ORJSON_OPTIONS)
+    
+    async def body():
+        yield head[:-1] + (b',' if len(head) > 2 else b'') + orjson.dumps(rows_key) + b':['
+        for i, row in enumerate(rows):
+            yield (b',' if i else b'') + orjson.dumps(row, option=ORJSON_OPTIONS)
+        yield b']}'
+    
+    return StreamingResponse(body(), media_type="application/json")
+
+def stream_ndjson_rows(payload: Dict, rows_key: str) -> StreamingResponse:
+    """
+    Envoie payload en NDJSON : une première ligne avec l'en-tête (sans rows_key),
+    puis une ligne par élément de payload[rows_key], lisibles au fil de l'eau
+    """
+    rows = payload[rows_key]
+    head = orjson.dumps({k: v for k, v in payload.items() if k != rows_key}, option=ORJSON_OPTIONS)
+    
+    async def body():
+        yield head + b'\n'
+        for row in rows:
+            yield orjson.dumps(row, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+def utc_now_iso() -> str:
+    """Horodatage courant à la seconde : formaté une seule fois par seconde"""
+    return iso_utc(int(time.time()))
+
+def data_source(result: Dict) -> str:
+    """Source des données d'une réponse, pour les journaux"""
+    return result.get("data_source") or "Unknown"
+
+def base_data_source(result: Dict) -> str:
+    """Source des données de base d'une prédiction, pour les journaux"""
+    try:
+        return result["metadata"]["base_data_source"]
+    except KeyError:
+        return "Unknown"
+
 def update_stats(endpoint_type: str):
     """Met à jour les statistiques d'utilisation"""
     usage_stats["total_requests"] += 1
     usage_stats[f"{endpoint_type}_requests"] += 1
 
-async def get_fallback_data(latitude: float, longitude: float) -> Dict:
-    """Données de fallback en cas d'erreur"""
-    return {
-        "name": await get_location_name(latitude, longitude),
-        "coordinates": [latitude, longitude],
-        "aqi": 50,
-        "pm25": 10.0,
-        "pm10": 15.0,
-        "no2": 20.0,
-        "o3": 40.0,
-        "so2": 5.0,
-        "co": 0.5,
-        "temperature": 15.0,
-        "humidity": 65.0,
-        "windSpeed": 3.0,
-        "windDirection": "N",
-        "pressure": 1013.0,
-        "visibility": 10.0,
-        "lastUpdated": datetime.utcnow().isoformat() + "Z",
-        "dataSource": "Fallback",
-        "weatherCondition": "clear"
-    }
+# Cache des noms de lieux : une position ne change pas de nom, donc clé = coordonnées
+# arrondies au millième (~100 m), durée de vie d'un jour, éviction LRU quand il est plein
+GEOCODE_CACHE_TTL = 86400
+GEOCODE_CACHE_MAX_ENTRIES = 10000
+geocode_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+# Second niveau, devant le précédent : coordonnées exactes déjà servies (client qui
+# interroge le même point en boucle), sans arrondi ni contrôle d'expiration ; LRU de
+# 4096 entrées, pas d'invalidation puisqu'un lieu ne change pas de nom
+LOCATION_NAME_HOT_MAX_ENTRIES = 4096
+location_name_hot: "OrderedDict[tuple, str]" = OrderedDict()
+# Un verrou par clé en cours de résolution : un seul appel Nominatim pour des requêtes simultanées
+geocode_locks: Dict[tuple, asyncio.Lock] = {}
 
-async def get_location_name(latitude: float, longitude: float) -> str:
-    """Obtient le nom de la localisation basé sur les coordonnées"""
-    # Utilise une géolocalisation simple et fiable
+def get_cached_location_name(key: tuple) -> Optional[str]:
+    """Retourne le nom en cache s'il n'a pas expiré (et le marque comme récemment utilisé)"""
+    entry = geocode_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        geocode_cache.move_to_end(key)
+        return entry[1]
+    return None
+
+def set_cached_location_name(key: tuple, name: str):
+    """Met un nom en cache ; évince le moins récemment utilisé quand le cache est plein"""
+    geocode_cache[key] = (time.monotonic() + GEOCODE_CACHE_TTL, name)
+    geocode_cache.move_to_end(key)
+    if len(geocode_cache) > GEOCODE_CACHE_MAX_ENTRIES:
+        geocode_cache.popitem(last=False)
+
+def remember_location_name(hot_key: tuple, name: str):
+    """Ajoute un nom résolu au second niveau ; évince le moins récemment utilisé"""
+    location_name_hot[hot_key] = name
+    if len(location_name_hot) > LOCATION_NAME_HOT_MAX_ENTRIES:
+        location_name_hot.popitem(last=False)
+
+def record_nominatim_result(success: bool):
+    """Met à jour le disjoncteur Nominatim ; l'ouvre après trop d'échecs consécutifs"""
+    if success:
+        nominatim_breaker["failures"] = 0
+        return
+    nominatim_breaker["failures"] += 1
+    if nominatim_breaker["failures"] >= NOMINATIM_BREAKER_THRESHOLD:
+        nominatim_breaker["open_until"] = time.monotonic() + NOMINATIM_BREAKER_COOLDOWN
+        logger.warning(f"⚠️ Nominatim indisponible: appels suspendus {NOMINATIM_BREAKER_COOLDOWN}s")
+
+async def reverse_geocode(latitude: float, longitude: float) -> Optional[str]:
+    """Géocodage inverse Nominatim ; None si le service n'a pas répondu ou est suspendu"""
+    # Disjoncteur ouvert : réponse immédiate plutôt que d'attendre un service en panne
+    if time.monotonic() < nominatim_breaker["open_until"]:
+        return None
+    
     try:
-        import aiohttp
-        url = "https://nominatim.openstreetmap.org/reverse"
         params = {
             'lat': latitude,
             'lon': longitude,
@@ -185,75 +549,129 @@ async def get_location_name(latitude: float, longitude: float) -> str:
             'addressdetails': 1
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    address = data.get('address', {})
-                    
-                    city = (address.get('city') or address.get('town') or 
-                           address.get('village') or address.get('municipality'))
-                    state = (address.get('state') or address.get('province') or 
-                            address.get('region'))
-                    country = address.get('country')
-                    
-                    parts = [p for p in [city, state, country] if p]
-                    return ', '.join(parts) if parts else f"Location {latitude:.3f}, {longitude:.3f}"
+        # Session partagée ouverte au démarrage : pas de nouvelle poignée de main TLS par appel
+        async with app.state.http.get(NOMINATIM_REVERSE_URL, params=params, timeout=NOMINATIM_TIMEOUT) as response:
+            if response.status == 200:
+                data = await response.json()
+                record_nominatim_result(True)
+                address = data.get('address', {})
+                
+                city = (address.get('city') or address.get('town') or 
+                       address.get('village') or address.get('municipality'))
+                state = (address.get('state') or address.get('province') or 
+                        address.get('region'))
+                country = address.get('country')
+                
+                parts = [p for p in [city, state, country] if p]
+                return ', '.join(parts) if parts else f"Location {latitude:.3f}, {longitude:.3f}"
     except Exception as e:
         logger.warning(f"⚠️ Erreur géolocalisation: {e}")
     
-    return f"Location {latitude:.3f}, {longitude:.3f}"
+    # Erreur réseau, délai dépassé ou statut HTTP inattendu (429 compris)
+    record_nominatim_result(False)
+    return None
+
+async def get_location_name(latitude: float, longitude: float) -> str:
+    """Obtient le nom de la localisation basé sur les coordonnées"""
+    hot_key = (latitude, longitude)
+    name = location_name_hot.get(hot_key)
+    if name is not None:
+        location_name_hot.move_to_end(hot_key)
+        return name
+    
+    key = (round(latitude, 3), round(longitude, 3))
+    name = get_cached_location_name(key)
+    if name is not None:
+        remember_location_name(hot_key, name)
+        return name
+    
+    lock = geocode_locks.setdefault(key, asyncio.Lock())
+    try:
+        async with lock:
+            # Revérifier : une requête concurrente a pu résoudre la clé pendant l'attente
+            name = get_cached_location_name(key)
+            if name is None:
+                name = await reverse_geocode(latitude, longitude)
+                # Les échecs ne sont pas mis en cache : nouvel essai à la prochaine requête
+                if name is not None:
+                    set_cached_location_name(key, name)
+    finally:
+        if geocode_locks.get(key) is lock and not lock.locked():
+            del geocode_locks[key]
+    
+    if name is None:
+        return f"Location {latitude:.3f}, {longitude:.3f}"
+    remember_location_name(hot_key, name)
+    return name
+
+# Réponse de secours pré-construite : copiée (en C) à chaque appel, seuls le nom, les
+# coordonnées et l'horodatage sont renseignés ; les clés gardent l'ordre du modèle
+FALLBACK_TEMPLATE = {
+    "name": None,
+    "coordinates": None,
+    "aqi": 50,
+    "pm25": 10.0,
+    "pm10": 15.0,
+    "no2": 20.0,
+    "o3": 40.0,
+    "so2": 5.0,
+    "co": 0.5,
+    "temperature": 15.0,
+    "humidity": 65.0,
+    "windSpeed": 3.0,
+    "windDirection": "N",
+    "pressure": 1013.0,
+    "visibility": 10.0,
+    "lastUpdated": None,
+    "dataSource": "Fallback Default",
+    "weatherCondition": "clear"
+}
 
 async def get_fallback_data(latitude: float, longitude: float) -> Dict:
     """Fonction de fallback vers des données par défaut"""
-    try:
-        logger.info("🔄 Utilisation du système de fallback")
-        
-        # Données par défaut basiques mais fonctionnelles
-        return {
-            "name": await get_location_name(latitude, longitude),
-            "coordinates": [latitude, longitude],
-            "aqi": 50,
-            "pm25": 10.0,
-            "pm10": 15.0,
-            "no2": 20.0,
-            "o3": 40.0,
-            "so2": 5.0,
-            "co": 0.5,
-            "temperature": 15.0,
-            "humidity": 65.0,
-            "windSpeed": 3.0,
-            "windDirection": "N",
-            "pressure": 1013.0,
-            "visibility": 10.0,
-            "lastUpdated": datetime.utcnow().isoformat() + "Z",
-            "dataSource": "Fallback Default",
-            "weatherCondition": "clear"
-        }
-        
-    except Exception as e:
-        logger.error(f"❌ Erreur fallback: {e}")
-        # Derniers secours - données par défaut
-        return {
-            "name": f"Location {latitude:.3f}, {longitude:.3f}",
-            "coordinates": [latitude, longitude],
-            "aqi": 50,
-            "pm25": 10.0,
-            "pm10": 15.0,
-            "no2": 20.0,
-            "o3": 40.0,
-            "so2": 5.0,
-            "co": 0.5,
-            "temperature": 15.0,
-            "humidity": 65.0,
-            "windSpeed": 3.0,
-            "windDirection": "N",
-            "pressure": 1013.0,
-            "visibility": 10.0,
-            "lastUpdated": datetime.utcnow().isoformat() + "Z",
-            "dataSource": "Emergency Fallback",
-            "weatherCondition": "clear"
-        }
+    logger.info("🔄 Utilisation du système de fallback")
+    
+    # get_location_name ne lève pas : nom Nominatim, en cache, ou "Location lat, lon"
+    data = FALLBACK_TEMPLATE.copy()
+    data["name"] = await get_location_name(latitude, longitude)
+    data["coordinates"] = [latitude, longitude]
+    data["lastUpdated"] = utc_now_iso()
+    return data
+
+# Page d'accueil : tout est statique sauf la durée de fonctionnement et les statistiques,
+# renseignées dans une copie à chaque requête (emplacements réservés pour garder l'ordre)
+ROOT_PAYLOAD = {
+    "message": "🌍 NASA TEMPO Air Quality API - Real Data Version",
+    "version": "2.0.0",
+    "status": "operational",
+    "uptime": None,
+    "data_sources": [
+        "🛰️ NASA TEMPO Satellite",
+        "🌐 OpenAQ Ground Stations", 
+        "🌤️ NOAA Weather Data",
+        "🏥 WHO Air Quality Standards",
+        "📡 NASA AIRS Atmospheric Sounder"
+    ],
+    "endpoints": {
+        "current_air_quality": "/location/full?latitude=45.5&longitude=2.3",
+        "forecast_24h": "/forecast?latitude=45.5&longitude=2.3&hours=24",
+        "historical_data": "/historical?latitude=45.5&longitude=2.3",
+        "health_info": "/health-recommendations?aqi=75"
+    },
+    "features": [
+        "✅ Real-time air quality from multiple sources",
+        "✅ Satellite and ground-based measurements",
+        "✅ 24-72h intelligent forecasting",
+        "✅ Historical data analysis",
+        "✅ WHO/EPA health recommendations",
+        "✅ Global coverage with regional optimization",
+        "✅ Automatic fallback systems",
+        "✅ Comprehensive weather integration"
+    ],
+    "usage_statistics": None,
+    "documentation": "/docs",
+    "real_time_status": "🟢 Active"
+}
 
 @app.get("/", tags=["Info"])
 async def root():
@@ -262,40 +680,11 @@ async def root():
     
     Informations générales sur l'API et les endpoints disponibles.
     """
-    uptime = datetime.now() - usage_stats["start_time"]
-    
-    return {
-        "message": "🌍 NASA TEMPO Air Quality API - Real Data Version",
-        "version": "2.0.0",
-        "status": "operational",
-        "uptime": str(uptime),
-        "data_sources": [
-            "🛰️ NASA TEMPO Satellite",
-            "🌐 OpenAQ Ground Stations", 
-            "🌤️ NOAA Weather Data",
-            "🏥 WHO Air Quality Standards",
-            "📡 NASA AIRS Atmospheric Sounder"
-        ],
-        "endpoints": {
-            "current_air_quality": "/location/full?latitude=45.5&longitude=2.3",
-            "forecast_24h": "/forecast?latitude=45.5&longitude=2.3&hours=24",
-            "historical_data": "/historical?latitude=45.5&longitude=2.3",
-            "health_info": "/health-recommendations?aqi=75"
-        },
-        "features": [
-            "✅ Real-time air quality from multiple sources",
-            "✅ Satellite and ground-based measurements",
-            "✅ 24-72h intelligent forecasting",
-            "✅ Historical data analysis",
-            "✅ WHO/EPA health recommendations",
-            "✅ Global coverage with regional optimization",
-            "✅ Automatic fallback systems",
-            "✅ Comprehensive weather integration"
-        ],
-        "usage_statistics": usage_stats,
-        "documentation": "/docs",
-        "real_time_status": "🟢 Active"
-    }
+    response = ROOT_PAYLOAD.copy()
+    response["uptime"] = str(datetime.now() - usage_stats["start_time"])
+    response["usage_statistics"] = usage_stats
+    return response
+
 @app.head(
     '/', 
     include_in_schema=False,
@@ -303,8 +692,8 @@ async def root():
     description="Renvoie un message de bienvenue pour confirmer que l'API fonctionne correctement.",
     response_description="Message de bienvenue"
 )
-async def root():
-    return JSONResponse({"message": "Hello World"})
+async def root_head():
+    return ORJSONResponse({"message": "Hello World"})
 
 
 @app.get("/health", tags=["Info"])
@@ -312,7 +701,7 @@ async def health_check():
     """🏥 Vérification de l'état de santé de l'API"""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "timestamp": utc_now_iso(),
         "services": {
             "air_quality_service": "operational",
             "data_connectors": "operational",
@@ -326,8 +715,7 @@ async def health_check():
 @app.get("/location/full", tags=["Current Data"])
 async def get_current_air_quality(
     latitude: float = Query(..., ge=-90, le=90, description="Latitude (-90 à 90)"),
-    longitude: float = Query(..., ge=-180, le=180, description="Longitude (-180 à 180)"),
-    background_tasks: BackgroundTasks = None
+    longitude: float = Query(..., ge=-180, le=180, description="Longitude (-180 à 180)")
 ):
     """
     🌍 **Données Actuelles de Qualité de l'Air avec Sources Réelles**
@@ -360,27 +748,31 @@ async def get_current_air_quality(
     - Tokyo: `latitude=35.6762&longitude=139.6503`
     """
     try:
-        # Validation des coordonnées
-        if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
-            raise HTTPException(
-                status_code=400, 
-                detail="Coordonnées invalides. Latitude: -90 à 90, Longitude: -180 à 180"
-            )
-        
         logger.info(f"🌍 Requête données actuelles: {latitude:.4f}, {longitude:.4f}")
         
-        # Mettre à jour les statistiques
-        if background_tasks:
-            background_tasks.add_task(update_stats, "current_data")
+        # Mettre à jour les statistiques (incrément en place, pas de tâche d'arrière-plan)
+        update_stats("current_data")
+        
+        cache_key = response_cache_key("current", latitude, longitude)
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            return cached
         
         # Récupérer les données réelles comme avant
         if air_quality_service:
             result = await air_quality_service.get_current_air_quality(latitude, longitude)
         else:
             # Fallback vers le service hybride si nécessaire
-            result = await hybrid_tempo_service.get_comprehensive_air_quality(latitude, longitude)
+            service = await get_hybrid_tempo_service()
+            result = await tempo_call(
+                hybrid_tempo_breaker, service.get_comprehensive_air_quality,
+                degraded_comprehensive, latitude, longitude
+            )
+        if is_cacheable(result):
+            set_cached_response(cache_key, result)
         
-        logger.info(f"✅ Données actuelles livrées: AQI {result.get('aqi', 'N/A')} - Source: {result.get('data_source', 'Unknown')}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"✅ Données actuelles livrées: AQI {result.get('aqi', 'N/A')} - Source: {data_source(result)}")
         
         return result
         
@@ -398,7 +790,10 @@ async def get_air_quality_forecast(
     latitude: float = Query(..., ge=-90, le=90, description="Latitude (-90 à 90)"),
     longitude: float = Query(..., ge=-180, le=180, description="Longitude (-180 à 180)"),
     hours: int = Query(24, ge=1, le=72, description="Nombre d'heures de prédiction (1-72)"),
-    background_tasks: BackgroundTasks = None
+    layout: str = Query(
+        "rows", pattern="^(rows|columns)$",
+        description="Format des prédictions: 'rows' (un objet par heure) ou 'columns' (un tableau par champ)"
+    )
 ):
     """
     🔮 **Prédictions de Qualité de l'Air Basées sur Données Réelles**
@@ -432,23 +827,25 @@ async def get_air_quality_forecast(
     - Niveau de confiance pour chaque prédiction
     """
     try:
-        # Validation
-        if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
-            raise HTTPException(status_code=400, detail="Coordonnées invalides")
+        logger.info(f"🔮 Requête prédictions: {latitude:.4f}, {longitude:.4f} - {hours}h")
         
-        if not (1 <= hours <= 72):
-            raise HTTPException(status_code=400, detail="Heures doit être entre 1 et 72")
+        # Mettre à jour les statistiques (incrément en place, pas de tâche d'arrière-plan)
+        update_stats("forecast")
         
-        logger.info(f"🔮 Requête prédictions: {latitude:.4f}, {longitude:.4f} - {hours}h")
+        # Générer les prédictions (le service garde les siennes en cache pour l'heure courante)
+        result = await air_quality_service.get_forecast_data(latitude, longitude, hours, layout)
         
-        # Mettre à jour les statistiques
-        if background_tasks:
-            background_tasks.add_task(update_stats, "forecast")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"✅ Prédictions générées: {hours}h - Source base: {base_data_source(result)}")
         
-        # Générer les prédictions
-        result = await air_quality_service.get_forecast_data(latitude, longitude, hours)
+        # Format colonnes : tableaux NumPy sérialisés directement par orjson (sans
+        # passer par jsonable_encoder)
+        if layout == "columns":
+            return ORJSONResponse(result)
         
-        logger.info(f"✅ Prédictions générées: {hours}h - Source base: {result.get('metadata', {}).get('base_data_source', 'Unknown')}")
+        # Prévisions longues : envoi en flux, ligne par ligne
+        if hours > STREAMING_ROWS_THRESHOLD and isinstance(result.get('forecast'), list):
+            return stream_json_rows(result, 'forecast')
         
         return result
         
@@ -483,7 +880,14 @@ async def get_historical_air_quality(
         le=10000, 
         description="Nombre maximum d'enregistrements"
     ),
-    background_tasks: BackgroundTasks = None
+    layout: str = Query(
+        "rows", pattern="^(rows|columns)$",
+        description="Format des mesures: 'rows' (un objet par mesure) ou 'columns' (un tableau par champ)"
+    ),
+    stream: bool = Query(
+        False,
+        description="NDJSON en flux (en-tête puis une mesure par ligne) ; ignoré en format 'columns'"
+    )
 ):
     """
     📊 **Données Historiques de Qualité de l'Air avec Sources Multiples**
@@ -522,10 +926,6 @@ async def get_historical_air_quality(
     - Analyse mensuelle: `start_date=2024-01-01T00:00:00&end_date=2024-01-31T23:59:59&limit=2000`
     """
     try:
-        # Validation des coordonnées
-        if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
-            raise HTTPException(status_code=400, detail="Coordonnées invalides")
-        
         # Dates par défaut: 24 dernières heures
         now = datetime.now()
         if start_date is None:
@@ -548,32 +948,45 @@ async def get_historical_air_quality(
                 detail=f"Plage temporelle limitée à {max_days} jours. Actuelle: {(end_date - start_date).days} jours"
             )
         
-        # Validation du polluant
-        valid_pollutants = ['pm25', 'pm10', 'no2', 'o3', 'so2', 'co']
-        if pollutant and pollutant.lower() not in valid_pollutants:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Polluant invalide. Options valides: {', '.join(valid_pollutants)}"
-            )
+        # Validation du polluant : normalisé une seule fois, puis transmis tel quel au service
+        if pollutant:
+            pollutant = pollutant.lower()
+            if pollutant not in VALID_POLLUTANTS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Polluant invalide. Options valides: {', '.join(HISTORICAL_POLLUTANTS)}"
+                )
         
         logger.info(f"📊 Requête historique: {latitude:.4f}, {longitude:.4f} - {start_date} à {end_date}")
         
-        # Mettre à jour les statistiques
-        if background_tasks:
-            background_tasks.add_task(update_stats, "historical")
+        # Mettre à jour les statistiques (incrément en place, pas de tâche d'arrière-plan)
+        update_stats("historical")
         
         # Récupérer les données historiques
         result = await air_quality_service.get_historical_data(
-            latitude, longitude, start_date, end_date, pollutant
+            latitude, longitude, start_date, end_date, pollutant, layout
         )
         
-        if not result.get("measurements"):
+        data_points = result.get("time_range", {}).get("data_points", 0)
+        if not data_points:
             raise HTTPException(
                 status_code=404,
                 detail="Aucune donnée historique trouvée pour les critères spécifiés"
             )
         
-        logger.info(f"✅ Données historiques livrées: {len(result['measurements'])} mesures")
+        logger.info(f"✅ Données historiques livrées: {data_points} mesures")
+        
+        # Format colonnes : tableaux NumPy sérialisés directement par orjson
+        if layout == "columns":
+            return ORJSONResponse(result)
+        
+        # NDJSON sur demande : le client traite chaque mesure dès sa réception
+        if stream:
+            return stream_ndjson_rows(result, 'measurements')
+        
+        # Séries longues : envoi en flux, mesure par mesure, sans encoder tout le corps d'un bloc
+        if data_points > STREAMING_ROWS_THRESHOLD:
+            return stream_json_rows(result, 'measurements')
         
         return result
         
@@ -609,8 +1022,8 @@ async def get_health_recommendations(
     - 301-500: 🟤 Dangereux
     """
     try:
-        service = RealAirQualityService()
-        recommendations = service._get_health_recommendations(aqi)
+        # Recherche dichotomique dans la table EPA pré-construite, sans passer par un service
+        recommendations = HEALTH_RECOMMENDATIONS[bisect_left(AQI_CATEGORY_BOUNDS, aqi)]
         
         return {
             "aqi": aqi,
@@ -620,7 +1033,7 @@ async def get_health_recommendations(
                 "last_updated": "2024",
                 "reference": "https://www.epa.gov/aqi"
             },
-            "timestamp": datetime.utcnow().isoformat() + "Z"
+            "timestamp": utc_now_iso()
         }
         
     except Exception as e:
@@ -630,73 +1043,88 @@ async def get_health_recommendations(
             detail=f"Erreur lors de la génération des recommandations: {str(e)}"
         )
 
+# Sources de données : contenu figé, sérialisé une fois à l'import ; l'ETag (empreinte
+# du corps) permet aux clients de revalider avec If-None-Match et de recevoir un 304
+DATA_SOURCES_PAYLOAD = {
+    "primary_sources": {
+        "nasa_tempo": {
+            "name": "NASA TEMPO (Tropospheric Emissions Monitoring of Pollution)",
+            "description": "Observations satellitaires de la pollution atmosphérique",
+            "website": "https://tempo.si.edu/",
+            "parameters": ["NO2", "HCHO", "O3", "Aerosol Index"],
+            "coverage": "Amérique du Nord",
+            "temporal_resolution": "Horaire en journée",
+            "spatial_resolution": "2.1 x 4.4 km"
+        },
+        "openaq": {
+            "name": "OpenAQ Global Air Quality Network",
+            "description": "Réseau mondial de capteurs de qualité de l'air",
+            "website": "https://openaq.org/",
+            "parameters": ["PM2.5", "PM10", "NO2", "O3", "SO2", "CO"],
+            "coverage": "Mondiale",
+            "stations": "15,000+ stations actives",
+            "data_frequency": "En temps réel"
+        },
+        "noaa": {
+            "name": "National Oceanic and Atmospheric Administration",
+            "description": "Service météorologique officiel américain",
+            "website": "https://www.noaa.gov/",
+            "parameters": ["Température", "Humidité", "Vent", "Pression"],
+            "coverage": "Mondiale avec focus USA",
+            "reliability": "Très élevée"
+        }
+    },
+    "secondary_sources": {
+        "nasa_airs": {
+            "name": "Atmospheric Infrared Sounder",
+            "description": "Sondeur infrarouge atmosphérique sur satellite Aqua",
+            "parameters": ["Température", "Humidité", "O3", "CO"],
+            "resolution": "45 km"
+        },
+        "nasa_sport": {
+            "name": "Short-term Prediction Research and Transition",
+            "description": "Données environnementales en temps quasi-réel",
+            "website": "https://weather.msfc.nasa.gov/sport/"
+        },
+        "who_standards": {
+            "name": "World Health Organization Air Quality Guidelines",
+            "description": "Standards et seuils de référence mondiale",
+            "website": "https://www.who.int/news-room/fact-sheets/detail/ambient-(outdoor)-air-quality-and-health"
+        }
+    },
+    "data_integration": {
+        "strategy": "Priorité par fiabilité et proximité",
+        "fallback_system": "Cascade intelligente avec estimations régionales",
+        "cache_duration": "5 minutes pour optimiser performances",
+        "quality_assessment": "Automatique avec scores de confiance"
+    },
+    "coverage": {
+        "global": "Estimations basées sur patterns régionaux",
+        "high_quality": "Zones avec stations OpenAQ et couverture TEMPO",
+        "real_time": "Principalement Amérique du Nord et Europe",
+        "historical": "Archives jusqu'à 10+ ans selon région"
+    }
+}
+DATA_SOURCES_BODY = orjson.dumps(DATA_SOURCES_PAYLOAD)
+# Validateur faible : le corps (> 1 Ko) part aussi compressé par GZipMiddleware, deux
+# représentations en octets du même contenu ; comparaison faible (sans le préfixe W/)
+DATA_SOURCES_OPAQUE_TAG = '"' + hashlib.md5(DATA_SOURCES_BODY).hexdigest() + '"'
+DATA_SOURCES_HEADERS = {
+    "ETag": "W/" + DATA_SOURCES_OPAQUE_TAG,
+    "Cache-Control": "public, max-age=3600"
+}
+
 @app.get("/data-sources", tags=["Info"])
-async def get_data_sources_info():
+async def get_data_sources_info(request: Request):
     """
     📡 **Informations sur les Sources de Données**
     
     Détaille toutes les sources de données intégrées dans l'API.
     """
-    return {
-        "primary_sources": {
-            "nasa_tempo": {
-                "name": "NASA TEMPO (Tropospheric Emissions Monitoring of Pollution)",
-                "description": "Observations satellitaires de la pollution atmosphérique",
-                "website": "https://tempo.si.edu/",
-                "parameters": ["NO2", "HCHO", "O3", "Aerosol Index"],
-                "coverage": "Amérique du Nord",
-                "temporal_resolution": "Horaire en journée",
-                "spatial_resolution": "2.1 x 4.4 km"
-            },
-            "openaq": {
-                "name": "OpenAQ Global Air Quality Network",
-                "description": "Réseau mondial de capteurs de qualité de l'air",
-                "website": "https://openaq.org/",
-                "parameters": ["PM2.5", "PM10", "NO2", "O3", "SO2", "CO"],
-                "coverage": "Mondiale",
-                "stations": "15,000+ stations actives",
-                "data_frequency": "En temps réel"
-            },
-            "noaa": {
-                "name": "National Oceanic and Atmospheric Administration",
-                "description": "Service météorologique officiel américain",
-                "website": "https://www.noaa.gov/",
-                "parameters": ["Température", "Humidité", "Vent", "Pression"],
-                "coverage": "Mondiale avec focus USA",
-                "reliability": "Très élevée"
-            }
-        },
-        "secondary_sources": {
-            "nasa_airs": {
-                "name": "Atmospheric Infrared Sounder",
-                "description": "Sondeur infrarouge atmosphérique sur satellite Aqua",
-                "parameters": ["Température", "Humidité", "O3", "CO"],
-                "resolution": "45 km"
-            },
-            "nasa_sport": {
-                "name": "Short-term Prediction Research and Transition",
-                "description": "Données environnementales en temps quasi-réel",
-                "website": "https://weather.msfc.nasa.gov/sport/"
-            },
-            "who_standards": {
-                "name": "World Health Organization Air Quality Guidelines",
-                "description": "Standards et seuils de référence mondiale",
-                "website": "https://www.who.int/news-room/fact-sheets/detail/ambient-(outdoor)-air-quality-and-health"
-            }
-        },
-        "data_integration": {
-            "strategy": "Priorité par fiabilité et proximité",
-            "fallback_system": "Cascade intelligente avec estimations régionales",
-            "cache_duration": "5 minutes pour optimiser performances",
-            "quality_assessment": "Automatique avec scores de confiance"
-        },
-        "coverage": {
-            "global": "Estimations basées sur patterns régionaux",
-            "high_quality": "Zones avec stations OpenAQ et couverture TEMPO",
-            "real_time": "Principalement Amérique du Nord et Europe",
-            "historical": "Archives jusqu'à 10+ ans selon région"
-        }
-    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match == "*" or DATA_SOURCES_OPAQUE_TAG in if_none_match:
+        return Response(status_code=304, headers=DATA_SOURCES_HEADERS)
+    return Response(DATA_SOURCES_BODY, media_type="application/json", headers=DATA_SOURCES_HEADERS)
 
 # Ajouter les nouveaux compteurs
 stats_counter["real_air_quality_requests"] = 0
@@ -707,7 +1135,10 @@ stats_counter["real_air_quality_errors"] = 0
 # ================================================================
 
 @app.get("/air-quality/real", response_model=dict, tags=["Pure Open Source"])
-async def get_real_air_quality_data(lat: float = 40.7128, lon: float = -74.006):
+async def get_real_air_quality_data(
+    lat: float = Query(40.7128, ge=-90, le=90, description="Latitude (-90 à 90)"),
+    lon: float = Query(-74.006, ge=-180, le=180, description="Longitude (-180 à 180)")
+):
     """
     🌍 **Données de Qualité de l'Air 100% Réelles et Fiables**
     
@@ -733,8 +1164,14 @@ async def get_real_air_quality_data(lat: float = 40.7128, lon: float = -74.006):
     try:
         logger.info(f"🌍 Données qualité air réelles: {lat}, {lon}")
         
-        # Utiliser le service d'intégration existant
-        result = await air_quality_integration.get_comprehensive_air_quality(lat, lon)
+        # Utiliser le service d'intégration existant (délai garanti < 5 s)
+        async with asyncio.timeout(ENDPOINT_TIMEOUTS["real_air_quality"]):
+            service = await get_air_quality_integration()
+            result = await cached_fetch(
+                response_cache_key("real", lat, lon),
+                lambda: service.get_comprehensive_air_quality(lat, lon),
+                lat, lon
+            )
         
         # Statistiques
         stats_counter.get("real_air_quality_requests", 0)
@@ -750,13 +1187,20 @@ async def get_real_air_quality_data(lat: float = 40.7128, lon: float = -74.006):
         
         return result
         
+    except TimeoutError:
+        logger.warning(f"⏱️ Données réelles: délai de {ENDPOINT_TIMEOUTS['real_air_quality']}s dépassé")
+        stats_counter["real_air_quality_timeouts"] += 1
+        raise HTTPException(status_code=504, detail="Délai de réponse des sources dépassé")
     except Exception as e:
         logger.error(f"❌ Erreur données réelles: {e}")
         stats_counter["real_air_quality_errors"] += 1
         raise HTTPException(status_code=500, detail=f"Erreur service réel: {str(e)}")
 
 @app.get("/tempo/fast", response_model=dict, tags=["TEMPO Optimisé"])
-async def get_fast_tempo_data(lat: float = 40.7128, lon: float = -74.006):
+async def get_fast_tempo_data(
+    lat: float = Query(40.7128, ge=-90, le=90, description="Latitude (-90 à 90)"),
+    lon: float = Query(-74.006, ge=-180, le=180, description="Longitude (-180 à 180)")
+):
     """
     🚀 **Données Rapides (Sans les problèmes TEMPO)**
     
@@ -769,12 +1213,22 @@ async def get_fast_tempo_data(lat: float = 40.7128, lon: float = -74.006):
     try:
         logger.info(f"⚡ Analyse rapide: {lat}, {lon}")
         
-        # Utiliser le service hybride TEMPO (version rapide avec optimisations)
-        result = await hybrid_tempo_service.get_comprehensive_air_quality(lat, lon)
+        # Utiliser le service hybride TEMPO (version rapide avec optimisations, < 8 s)
+        # Même analyse (et même entrée de cache) que /tempo/comprehensive ; le délai
+        # s'applique à l'attente de cette requête, pas à l'appel partagé
+        async with asyncio.timeout(ENDPOINT_TIMEOUTS["fast_tempo"]):
+            result = await cached_fetch(
+                response_cache_key("comprehensive", lat, lon),
+                lambda: shared_comprehensive_call(lat, lon),
+                lat, lon
+            )
         
-        # Ajouter info sur l'optimisation
-        result['note'] = 'Service TEMPO optimisé - métadonnées seulement, pas de téléchargement'
-        result['tempo_status'] = 'optimized_metadata_only'
+        # Ajouter info sur l'optimisation (sur une copie : le résultat peut venir du cache)
+        result = {
+            **result,
+            'note': 'Service TEMPO optimisé - métadonnées seulement, pas de téléchargement',
+            'tempo_status': 'circuit_open' if result.get('status') == 'degraded' else 'optimized_metadata_only'
+        }
         
         # Statistiques
         stats_counter["fast_tempo_requests"] += 1
@@ -784,6 +1238,10 @@ async def get_fast_tempo_data(lat: float = 40.7128, lon: float = -74.006):
         
         return result
         
+    except TimeoutError:
+        logger.warning(f"⏱️ Endpoint rapide: délai de {ENDPOINT_TIMEOUTS['fast_tempo']}s dépassé")
+        stats_counter["fast_tempo_timeouts"] += 1
+        raise HTTPException(status_code=504, detail="Délai de réponse des sources dépassé")
     except Exception as e:
         logger.error(f"❌ Erreur endpoint rapide: {e}")
         stats_counter["fast_tempo_errors"] += 1
@@ -820,7 +1278,11 @@ async def get_latest_tempo_data(
     try:
         logger.info(f"🛰️ Requête TEMPO Latest: {latitude}, {longitude}")
         
-        result = await tempo_latest_service.get_latest_tempo_data(latitude, longitude)
+        service = await get_tempo_latest_service()
+        result = await tempo_call(
+            tempo_latest_breaker, service.get_latest_tempo_data,
+            degraded_latest, latitude, longitude
+        )
         
         if result.get('status') == 'success':
             logger.info(f"✅ TEMPO Latest livré: {len(result.get('pollutants', {}))} polluants")
@@ -857,7 +1319,11 @@ async def get_tempo_data_summary(
     try:
         logger.info(f"📊 Résumé TEMPO demandé: {latitude}, {longitude}")
         
-        summary = await tempo_latest_service.get_tempo_summary(latitude, longitude)
+        service = await get_tempo_latest_service()
+        summary = await tempo_call(
+            tempo_latest_breaker, service.get_tempo_summary,
+            degraded_summary, latitude, longitude
+        )
         
         logger.info(f"📊 Résumé TEMPO livré: {summary.get('status', 'unknown')}")
         return summary
@@ -905,8 +1371,13 @@ async def get_comprehensive_tempo_analysis(
     try:
         logger.info(f"🎯 Analyse TEMPO complète: {latitude}, {longitude}")
         
-        # Utiliser le service hybride original
-        result = await hybrid_tempo_service.get_comprehensive_air_quality(latitude, longitude)
+        # Utiliser le service hybride original (timeout agressif 10 s)
+        async with asyncio.timeout(ENDPOINT_TIMEOUTS["comprehensive"]):
+            result = await cached_fetch(
+                response_cache_key("comprehensive", latitude, longitude),
+                lambda: shared_comprehensive_call(latitude, longitude),
+                latitude, longitude
+            )
         
         # Statistiques  
         stats_counter["comprehensive_requests"] += 1
@@ -920,6 +1391,10 @@ async def get_comprehensive_tempo_analysis(
         
         return result
         
+    except TimeoutError:
+        logger.warning(f"⏱️ Analyse TEMPO complète: délai de {ENDPOINT_TIMEOUTS['comprehensive']}s dépassé")
+        stats_counter["comprehensive_timeouts"] += 1
+        raise HTTPException(status_code=504, detail="Délai de l'analyse complète dépassé")
     except Exception as e:
         logger.error(f"❌ Erreur analyse TEMPO complète: {e}")
         stats_counter["comprehensive_errors"] += 1
@@ -931,7 +1406,8 @@ async def get_comprehensive_tempo_analysis(
 @app.get("/statistics", tags=["Info"])
 async def get_api_statistics():
     """📈 Statistiques d'utilisation de l'API"""
-    uptime = datetime.now() - usage_stats["start_time"]
+    now = datetime.now()
+    uptime = now - usage_stats["start_time"]
     
     return {
         "api_statistics": usage_stats,
@@ -952,7 +1428,7 @@ async def get_api_statistics():
             )[0] if usage_stats["total_requests"] > 0 else "none"
         },
         "version": "2.0.0",
-        "timestamp": datetime.utcnow().isoformat() + "Z"
+        "timestamp": iso_utc(int(now.timestamp()))
     }
 
 # Point d'entrée pour uvicorn
@@ -5,6 +5,7 @@ V3.0 - Vraies données NASA TEMPO + OpenAQ + Fallback intelligent
 """
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from datetime import datetime, timedelta
 import random
 import math
@@ -21,7 +22,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="NASA TEMPO Air Quality API - Hybrid Intelligence",
     description="🛰️ Vraies données NASA TEMPO + OpenAQ + Fallback intelligent basé sur patterns réels",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
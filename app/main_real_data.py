@@ -6,6 +6,7 @@ Version 2.0 - Données réelles
 
 from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
@@ -60,7 +61,8 @@ app = FastAPI(
     license_info={
         "name": "NASA Open Data License",
         "url": "https://www.nasa.gov/about/highlights/HP_Privacy.html",
-    }
+    },
+    default_response_class=ORJSONResponse
 )
 
 # Configuration CORS
@@ -177,13 +179,6 @@ async def get_current_air_quality(
     - Tokyo: `latitude=35.6762&longitude=139.6503`
     """
     try:
-        # Validation des coordonnées
-        if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
-            raise HTTPException(
-                status_code=400, 
-                detail="Coordonnées invalides. Latitude: -90 à 90, Longitude: -180 à 180"
-            )
-        
         logger.info(f"🌍 Requête données actuelles: {latitude:.4f}, {longitude:.4f}")
         
         # Mettre à jour les statistiques
@@ -245,13 +240,6 @@ async def get_air_quality_forecast(
     - Niveau de confiance pour chaque prédiction
     """
     try:
-        # Validation
-        if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
-            raise HTTPException(status_code=400, detail="Coordonnées invalides")
-        
-        if not (1 <= hours <= 72):
-            raise HTTPException(status_code=400, detail="Heures doit être entre 1 et 72")
-        
         logger.info(f"🔮 Requête prédictions: {latitude:.4f}, {longitude:.4f} - {hours}h")
         
         # Mettre à jour les statistiques
@@ -335,10 +323,6 @@ async def get_historical_air_quality(
     - Analyse mensuelle: `start_date=2024-01-01T00:00:00&end_date=2024-01-31T23:59:59&limit=2000`
     """
     try:
-        # Validation des coordonnées
-        if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
-            raise HTTPException(status_code=400, detail="Coordonnées invalides")
-        
         # Dates par défaut: 24 dernières heures
         now = datetime.now()
         if start_date is None:
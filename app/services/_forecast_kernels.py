@@ -0,0 +1,82 @@
+"""
+Noyau numérique des prévisions de qualité de l'air
+Sans I/O ni dictionnaires : compilé par numba quand il est disponible,
+version NumPy vectorisée sinon
+"""
+import numpy as np
+
+# Numba est optionnel : compile la boucle heure x polluant du modèle de prévision
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Ordre fixe des polluants dans les tableaux (lignes de values / noise)
+FORECAST_POLLUTANTS = ('pm25', 'pm10', 'no2', 'o3', 'so2', 'co')
+
+# Décalages (heures) des courbes diurnes : solaire, pic du matin, pm10, so2, pic du soir
+DIURNAL_SHIFTS = np.array([6.0, 8.0, 9.0, 10.0, 18.0])
+# Les heures de prévision sont entières (mod 24) : chaque courbe sin(2pi(h - d)/24) ne
+# prend que 24 valeurs, tabulées (courbe x heure du jour) une fois à l'import
+DIURNAL_CURVES = np.sin(2 * np.pi * (np.arange(24)[None, :] - DIURNAL_SHIFTS[:, None]) / 24)
+
+# Coefficients (polluant x courbe) : facteur diurne = 1 + DIURNAL_COEF @ courbes
+DIURNAL_COEF = np.array([
+    [0.0, 0.3, 0.0, 0.0, 0.0],    # pm25 : pics matin/soir
+    [0.0, 0.0, 0.25, 0.0, 0.0],   # pm10
+    [0.0, 0.4, 0.0, 0.0, 0.4],    # no2 : 2 pics trafic
+    [0.0, 0.0, 0.0, 0.0, 0.0],    # o3 : voir SOLAR_MASK
+    [0.0, 0.0, 0.0, 0.2, 0.0],    # so2
+    [0.0, 0.35, 0.0, 0.0, 0.35],  # co
+])
+# Polluants photochimiques : facteur = max(SOLAR_FLOOR, courbe solaire) (pic l'après-midi)
+SOLAR_MASK = np.array([0.0, 0.0, 0.0, 1.0, 0.0, 0.0])
+SOLAR_FLOOR = 0.3
+
+# Facteurs diurnes complets (polluant x heure du jour) et courbe solaire, tabulés à
+# l'import : à la requête il ne reste qu'une indexation par (now_hour + h) % 24
+SOLAR_CURVE = DIURNAL_CURVES[0]
+_SOLAR_ROWS = SOLAR_MASK[:, None]
+DIURNAL_FACTORS = (
+    _SOLAR_ROWS * np.maximum(SOLAR_FLOOR, SOLAR_CURVE)
+    + (1 - _SOLAR_ROWS) * (1 + DIURNAL_COEF @ DIURNAL_CURVES)
+)
+
+def forecast_kernel_numpy(base_values: np.ndarray, now_hour: int, current_temp: float,
+                          wind_factor: float, temp_noise: np.ndarray, noise: np.ndarray):
+    """Valeurs prédites (polluants x heures), températures et confiances par heure"""
+    hours = temp_noise.shape[0]
+    hour_offsets = np.arange(1, hours + 1)
+    hours_of_day = (now_hour + hour_offsets) % 24
+    factors = DIURNAL_FACTORS[:, hours_of_day]
+    solar = SOLAR_CURVE[hours_of_day]
+
+    temps = current_temp + 8 * solar + temp_noise
+    temp_factor = 1 + (temps - current_temp) * 0.01  # 1% par degré
+    values = np.maximum(0.0, base_values[:, None] * factors * (temp_factor * wind_factor) * noise)
+    confidences = np.maximum(0.4, 0.95 - hour_offsets * 0.015)
+    return values, temps, confidences
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def forecast_kernel(base_values, now_hour, current_temp, wind_factor, temp_noise, noise):
+        """Même modèle que forecast_kernel_numpy en une seule boucle compilée"""
+        hours = temp_noise.shape[0]
+        values = np.empty((base_values.shape[0], hours))
+        temps = np.empty(hours)
+        confidences = np.empty(hours)
+        n_pollutants = DIURNAL_FACTORS.shape[0]
+        for h in range(hours):
+            hour_of_day = (now_hour + h + 1) % 24
+            temps[h] = current_temp + 8 * SOLAR_CURVE[hour_of_day] + temp_noise[h]
+            scale = (1 + (temps[h] - current_temp) * 0.01) * wind_factor
+            for p in range(n_pollutants):
+                values[p, h] = max(0.0, base_values[p] * DIURNAL_FACTORS[p, hour_of_day] * scale * noise[p, h])
+            confidences[h] = max(0.4, 0.95 - (h + 1) * 0.015)
+        return values, temps, confidences
+
+    # Compilation (ou chargement du cache disque) à l'import plutôt qu'à la première requête
+    forecast_kernel(np.ones(6), 0, 15.0, 1.0, np.zeros(1), np.ones((6, 1)))
+else:
+    forecast_kernel = forecast_kernel_numpy
@@ -0,0 +1,98 @@
+"""
+Fonctions numériques du calcul d'AQI
+Version scalaire entièrement annotée, compilable telle quelle (mypyc/Cython),
+et version vectorisée NumPy pour les séries (prévisions, historique) ;
+utilitaires partagés : générateur aléatoire par thread, horodatages UTC
+"""
+import threading
+import time
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+# Horodatages UTC formatés depuis une seconde epoch entière
+ISO_UTC_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+@lru_cache(maxsize=1)
+def iso_utc(epoch_second: int) -> str:
+    """Horodatage ISO 8601 UTC, réutilisé tel quel pour tous les appels de la même seconde"""
+    return time.strftime(ISO_UTC_FORMAT, time.gmtime(epoch_second))
+
+# Générateur aléatoire (PCG64) par thread : les tirages sont vectorisés et une partie
+# s'exécute dans des threads (asyncio.to_thread) ; un Generator n'étant pas thread-safe,
+# chaque thread a le sien (aucun verrou)
+_rng_local = threading.local()
+
+def thread_rng() -> np.random.Generator:
+    """Generator du thread courant, créé au premier usage"""
+    rng = getattr(_rng_local, 'rng', None)
+    if rng is None:
+        rng = _rng_local.rng = np.random.default_rng()
+    return rng
+
+Breakpoints = Tuple[Tuple[float, float, int, int], ...]
+
+# Breakpoints EPA : (c_low, c_high, aqi_low, aqi_high)
+PM25_BREAKPOINTS: Breakpoints = (
+    (0, 12, 0, 50), (12.1, 35.4, 51, 100), (35.5, 55.4, 101, 150),
+    (55.5, 150.4, 151, 200), (150.5, 250.4, 201, 300), (250.5, float('inf'), 301, 500)
+)
+
+PM10_BREAKPOINTS: Breakpoints = (
+    (0, 54, 0, 50), (55, 154, 51, 100), (155, 254, 101, 150),
+    (255, 354, 151, 200), (355, 424, 201, 300), (425, float('inf'), 301, 500)
+)
+
+NO2_BREAKPOINTS: Breakpoints = (
+    (0, 25, 0, 50), (25.1, 50, 51, 100), (50.1, 100, 101, 150),
+    (100.1, 200, 151, 200), (200.1, 400, 201, 300), (400.1, float('inf'), 301, 500)
+)
+
+def aqi_sub_index(concentration: float, breakpoints: Breakpoints) -> int:
+    """Sous-indice AQI d'un polluant par interpolation linéaire entre breakpoints"""
+    for c_low, c_high, aqi_low, aqi_high in breakpoints:
+        if c_low <= concentration <= c_high:
+            return int(((aqi_high - aqi_low) / (c_high - c_low)) * (concentration - c_low) + aqi_low)
+    return 500
+
+def calculate_aqi(pm25: float, pm10: float, no2: float) -> int:
+    """AQI (standard EPA) : max des sous-indices PM2.5, PM10 et NO2, 50 sans mesure"""
+    if pm25 <= 0 and pm10 <= 0 and no2 <= 0:
+        return 50
+    
+    # Les sous-indices sont >= 0 : un polluant absent compte pour 0 dans le max
+    return max(
+        aqi_sub_index(pm25, PM25_BREAKPOINTS) if pm25 > 0 else 0,
+        aqi_sub_index(pm10, PM10_BREAKPOINTS) if pm10 > 0 else 0,
+        aqi_sub_index(no2, NO2_BREAKPOINTS) if no2 > 0 else 0
+    )
+
+def _breakpoint_columns(breakpoints: Breakpoints) -> Tuple[np.ndarray, ...]:
+    """Breakpoints en colonnes (c_low, c_high, aqi_low, aqi_high) pour le calcul vectorisé"""
+    return tuple(np.array(column, dtype=float) for column in zip(*breakpoints))
+
+_PM25_COLUMNS = _breakpoint_columns(PM25_BREAKPOINTS)
+_PM10_COLUMNS = _breakpoint_columns(PM10_BREAKPOINTS)
+_NO2_COLUMNS = _breakpoint_columns(NO2_BREAKPOINTS)
+
+def aqi_sub_index_batch(concentrations: np.ndarray, columns: Tuple[np.ndarray, ...]) -> np.ndarray:
+    """aqi_sub_index sur un tableau : segment trouvé par searchsorted, 500 hors breakpoints"""
+    c_low, c_high, aqi_low, aqi_high = columns
+    segment = np.maximum(np.searchsorted(c_low, concentrations, side='right') - 1, 0)
+    lo = c_low[segment]
+    sub_index = ((aqi_high[segment] - aqi_low[segment]) / (c_high[segment] - lo)) * (concentrations - lo) + aqi_low[segment]
+    in_range = (concentrations >= lo) & (concentrations <= c_high[segment])
+    return np.where(in_range, np.trunc(sub_index), 500).astype(np.int64)
+
+def calculate_aqi_batch(pm25: np.ndarray, pm10: np.ndarray, no2: np.ndarray) -> np.ndarray:
+    """calculate_aqi élément par élément sur des séries de concentrations (même résultat)"""
+    pm25 = np.asarray(pm25, dtype=float)
+    pm10 = np.asarray(pm10, dtype=float)
+    no2 = np.asarray(no2, dtype=float)
+    aqi = np.maximum.reduce([
+        np.where(pm25 > 0, aqi_sub_index_batch(pm25, _PM25_COLUMNS), 0),
+        np.where(pm10 > 0, aqi_sub_index_batch(pm10, _PM10_COLUMNS), 0),
+        np.where(no2 > 0, aqi_sub_index_batch(no2, _NO2_COLUMNS), 0)
+    ])
+    return np.where((pm25 <= 0) & (pm10 <= 0) & (no2 <= 0), 50, aqi)
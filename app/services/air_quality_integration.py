@@ -2,7 +2,8 @@
 import asyncio
 import logging
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
+import aiohttp
 import sys
 import os
 
@@ -21,13 +22,23 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Zones urbaines : (lat, lon, demi-côté du carré en degrés), construites une fois à l'import
+URBAN_AREAS = (
+    (48.8566, 2.3522, 0.8),   # Paris
+    (40.7128, -74.0060, 0.8),  # NYC
+    (34.0522, -118.2437, 0.8), # LA
+    (51.5074, -0.1278, 0.8),   # London
+    (43.6532, -79.3832, 0.5),  # Toronto
+)
+
 class AirQualityIntegration:
     """Service d'intégration pour votre endpoint /location/full"""
     
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        # session : pool HTTP partagé de l'application, réutilisé par les collecteurs
         self.tempo_client = TempoFullClient()
-        self.weather_client = OpenWeatherClient()
-        self.open_source_collector = OpenSourceAPICollector()
+        self.weather_client = OpenWeatherClient(session)
+        self.open_source_collector = OpenSourceAPICollector(session)
         
     async def get_real_time_data(self, lat: float, lon: float) -> Dict:
         """
@@ -36,6 +47,10 @@ class AirQualityIntegration:
         """
         final_data = {}
         
+        # La météo ne dépend pas des sources de pollution: lancée dès maintenant
+        # en parallèle de la chaîne TEMPO → APIs Open Source
+        weather_task = asyncio.create_task(self.weather_client.get_weather_data(lat, lon))
+        
         # 1. TEMPO - Données satellites (priorité absolue)
         logger.info("🛰️ Récupération des données TEMPO...")
         tempo_data = await self.tempo_client.get_all_pollutants(lat, lon)
@@ -65,7 +80,7 @@ class AirQualityIntegration:
         
         # 3. Météo - OpenWeather (toujours essayé)
         logger.info("�️ Récupération des données météo...")
-        weather_data = await self.weather_client.get_weather_data(lat, lon)
+        weather_data = await weather_task
         
         if weather_data:
             final_data.update(weather_data)
@@ -148,18 +163,10 @@ class AirQualityIntegration:
     
     def _is_urban_area(self, lat: float, lon: float) -> bool:
         """Détecte les zones urbaines"""
-        urban_areas = [
-            (48.8566, 2.3522, 0.8),   # Paris
-            (40.7128, -74.0060, 0.8),  # NYC
-            (34.0522, -118.2437, 0.8), # LA
-            (51.5074, -0.1278, 0.8),   # London
-            (43.6532, -79.3832, 0.5),  # Toronto
-        ]
-        
-        for city_lat, city_lon, radius in urban_areas:
-            if abs(lat - city_lat) < radius and abs(lon - city_lon) < radius:
-                return True
-        return False
+        return any(
+            abs(lat - city_lat) < radius and abs(lon - city_lon) < radius
+            for city_lat, city_lon, radius in URBAN_AREAS
+        )
     
     def _calculate_comprehensive_aqi(self, data: Dict) -> int:
         """Calcule l'AQI basé sur les données disponibles"""
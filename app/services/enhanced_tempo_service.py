@@ -4,8 +4,9 @@ Integrates all real data sources for comprehensive air quality data
 """
 import asyncio
 import logging
+import numpy as np
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import ClassVar, Dict, Any, Optional, List
 from geopy.geocoders import Nominatim
 
 from ..connectors.enhanced_realtime_connector import EnhancedRealTimeConnector
@@ -22,6 +23,16 @@ class EnhancedNASATempoService:
     - WHO guidelines compliance
     """
     
+    # Data quality scoring: (source name, weight) pairs and essential pollutants
+    # are constants, built once at class creation instead of per instance/call
+    _SOURCE_WEIGHT_ITEMS: ClassVar[tuple] = (
+        ('NASA TEMPO Satellite', 40.0),
+        ('OpenAQ Global Network', 30.0)
+    )
+    _SOURCE_NAMES: ClassVar[tuple] = tuple(name for name, _ in _SOURCE_WEIGHT_ITEMS)
+    _SOURCE_WEIGHTS: ClassVar[np.ndarray] = np.array([weight for _, weight in _SOURCE_WEIGHT_ITEMS])
+    _ESSENTIAL_POLLUTANTS: ClassVar[frozenset] = frozenset(('pm25', 'no2', 'o3'))
+    
     def __init__(self, nasa_username=None, nasa_password=None, nasa_token=None):
         self.connector = EnhancedRealTimeConnector(nasa_username, nasa_password, nasa_token)
         self.geocoder = Nominatim(user_agent="nasa-tempo-api")
@@ -184,10 +195,12 @@ class EnhancedNASATempoService:
     def _generate_health_recommendations(self, pollutants: Dict) -> List[str]:
         """Generate health recommendations based on pollution levels"""
         recommendations = []
+        high_pollution = False
         
         # Check each pollutant for health concerns
         for pollutant, data in pollutants.items():
             if data.get('exceeds_who'):
+                high_pollution = True
                 if pollutant == 'pm25':
                     recommendations.append("High PM2.5: Limit outdoor activities, especially for sensitive groups")
                 elif pollutant == 'no2':
@@ -202,7 +215,6 @@ class EnhancedNASATempoService:
             recommendations.append("Air quality is acceptable for outdoor activities")
         
         # Add sensitive group warnings if needed
-        high_pollution = any(data.get('exceeds_who') for data in pollutants.values())
         if high_pollution:
             recommendations.append("Sensitive groups (children, elderly, respiratory conditions) should take extra precautions")
         
@@ -241,21 +253,19 @@ class EnhancedNASATempoService:
     
     def _assess_data_quality(self, raw_data: Dict) -> Dict[str, Any]:
         """Assess overall data quality"""
-        quality_score = 0
-        total_sources = 0
-        
         # Score based on data sources
         sources = raw_data.get('sources', [])
-        if 'NASA TEMPO Satellite' in sources:
-            quality_score += 40
-        if 'OpenAQ Global Network' in sources:
-            quality_score += 30
+        active_sources = frozenset(sources)
+        coverages = np.fromiter(
+            (name in active_sources for name in self._SOURCE_NAMES),
+            dtype=np.float64, count=len(self._SOURCE_NAMES)
+        )
+        quality_score = float(self._SOURCE_WEIGHTS @ coverages)
         
         # Score based on pollutant coverage
         pollutants = raw_data.get('pollutants', {})
-        essential_pollutants = ['pm25', 'no2', 'o3']
-        covered_essential = sum(1 for p in essential_pollutants if p in pollutants)
-        quality_score += (covered_essential / len(essential_pollutants)) * 30
+        covered_essential = len(self._ESSENTIAL_POLLUTANTS & pollutants.keys())
+        quality_score += (covered_essential / len(self._ESSENTIAL_POLLUTANTS)) * 30
         
         # Determine quality level
         if quality_score >= 80:
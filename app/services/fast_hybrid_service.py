@@ -74,8 +74,12 @@ class FastHybridService:
             logger.info("🌍 Récupération concentrations APIs Open Source...")
             
             # Correction : appel asynchrone correct
-            open_source_data = await self.open_source_collector.get_all_available_data(lat, lon)
-            weather_data = await self.weather_client.get_weather_data(lat, lon)  # Correction du nom de méthode
+            open_source_data, weather_data = await asyncio.gather(
+                self.open_source_collector.get_all_available_data(
+                    lat, lon, min_sources=2, deadline=2.0
+                ),
+                self.weather_client.get_weather_data(lat, lon)
+            )
             
             # 2. TEMPO optionnel avec timeout très court (2 secondes max)
             tempo_data = None
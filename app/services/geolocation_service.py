@@ -9,9 +9,54 @@ from typing import Dict, Optional, Tuple
 import logging
 import json
 import math
+import numpy as np
+
+# Numba est optionnel: compilation JIT du scan de la ville la plus proche
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371.0
+
+def _nearest_city_numpy(lat: float, lon: float, coords: np.ndarray) -> Tuple[int, float]:
+    """Index et distance (km) du point le plus proche - version vectorisée NumPy"""
+    lat_r = math.radians(lat)
+    lon_r = math.radians(lon)
+    dlat = coords[:, 0] - lat_r
+    dlon = coords[:, 1] - lon_r
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat_r) * np.cos(coords[:, 0]) * np.sin(dlon / 2) ** 2
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    index = int(np.argmin(distances))
+    return index, float(distances[index])
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _nearest_city(lat, lon, coords):
+        """Index et distance (km) du point le plus proche - boucle compilée Numba"""
+        lat_r = math.radians(lat)
+        lon_r = math.radians(lon)
+        cos_lat = math.cos(lat_r)
+        best = 1e18
+        best_index = -1
+        for i in range(coords.shape[0]):
+            dlat = coords[i, 0] - lat_r
+            dlon = coords[i, 1] - lon_r
+            a = math.sin(dlat / 2) ** 2 + cos_lat * math.cos(coords[i, 0]) * math.sin(dlon / 2) ** 2
+            d = 2.0 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+            if d < best:
+                best = d
+                best_index = i
+        return best_index, best
+
+    # Compilation (ou chargement du cache disque) à l'import plutôt qu'à la première requête
+    _nearest_city(0.0, 0.0, np.zeros((1, 2)))
+else:
+    _nearest_city = _nearest_city_numpy
+
 class AdvancedGeolocationService:
     """Service avancé de géolocalisation avec sources multiples"""
     
@@ -101,6 +146,11 @@ class AdvancedGeolocationService:
             (25.0330, 121.5654, "Taipei", "Taïwan"),
         ]
         
+        # Coordonnées des villes en radians, préparées une fois pour le scan du plus proche
+        self._city_coords = np.radians(
+            np.array([(city[0], city[1]) for city in self.major_cities], dtype=np.float64)
+        )
+        
         # Régions géographiques pour estimations
         self.geographical_regions = {
             "Europe de l'Ouest": (50.0, 10.0, 35.0, 60.0, -10.0, 30.0),
@@ -118,6 +168,19 @@ class AdvancedGeolocationService:
             "Arctique": (70.0, 0.0, 60.0, 90.0, -180.0, 180.0),
             "Antarctique": (-70.0, 0.0, -90.0, -60.0, -180.0, 180.0)
         }
+        
+        # Boîtes des régions (min_lat, max_lat, min_lon, max_lon) pour la classification
+        # vectorisée; les codes indexent self._region_names
+        self._region_boxes = np.array(
+            [box[2:] for box in self.geographical_regions.values()], dtype=np.float64
+        )
+        self._region_names = np.array(list(self.geographical_regions) + [
+            "Régions Arctiques",
+            "Régions Antarctiques",
+            "Régions Tropicales",
+            "Régions Subtropicales",
+            "Régions Tempérées"
+        ])
     
     async def __aenter__(self):
         """Initialise la session HTTP"""
@@ -156,35 +219,41 @@ class AdvancedGeolocationService:
     
     def find_closest_major_city(self, latitude: float, longitude: float, max_distance: float = 100.0) -> Optional[Tuple[str, str, float]]:
         """Trouve la ville majeure la plus proche dans un rayon donné"""
-        closest_city = None
-        min_distance = float('inf')
+        index, distance = _nearest_city(latitude, longitude, self._city_coords)
         
-        for city_lat, city_lon, city_name, country in self.major_cities:
-            distance = self.calculate_distance(latitude, longitude, city_lat, city_lon)
-            
-            if distance <= max_distance and distance < min_distance:
-                min_distance = distance
-                closest_city = (city_name, country, distance)
+        if index < 0 or distance > max_distance:
+            return None
         
-        return closest_city
+        _, _, city_name, country = self.major_cities[index]
+        return (city_name, country, float(distance))
     
     def determine_geographical_region(self, latitude: float, longitude: float) -> str:
         """Détermine la région géographique basée sur les coordonnées"""
-        for region_name, (center_lat, center_lon, min_lat, max_lat, min_lon, max_lon) in self.geographical_regions.items():
-            if min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon:
-                return region_name
+        code = self.classify_regions(np.array([latitude]), np.array([longitude]))[0]
+        return str(self._region_names[code])
+    
+    def classify_regions(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """Classe un lot de points en codes de région (indices dans self._region_names)"""
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+        boxes = self._region_boxes
+        
+        # Une ligne de masque par boîte, la première boîte correspondante l'emporte
+        in_box = (
+            (lats >= boxes[:, 0:1]) & (lats <= boxes[:, 1:2]) &
+            (lons >= boxes[:, 2:3]) & (lons <= boxes[:, 3:4])
+        )
         
         # Régions spéciales
-        if latitude > 60:
-            return "Régions Arctiques"
-        elif latitude < -60:
-            return "Régions Antarctiques"
-        elif abs(latitude) < 23.5:
-            return "Régions Tropicales"
-        elif 23.5 <= abs(latitude) < 35:
-            return "Régions Subtropicales"
-        else:
-            return "Régions Tempérées"
+        abs_lats = np.abs(lats)
+        conditions = list(in_box) + [
+            lats > 60,
+            lats < -60,
+            abs_lats < 23.5,
+            (abs_lats >= 23.5) & (abs_lats < 35)
+        ]
+        n_boxes = len(boxes)
+        return np.select(conditions, list(range(n_boxes + 4)), default=n_boxes + 4)
     
     def get_country_from_coordinates(self, latitude: float, longitude: float) -> str:
         """Estime le pays basé sur les coordonnées (logique simplifiée)"""
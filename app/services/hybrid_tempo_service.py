@@ -2,9 +2,12 @@
 Service hybride intelligent : TEMPO + APIs Open Source avec calcul d'AQI précis
 Combine la qualité TEMPO avec les concentrations réelles des APIs ouvertes
 """
+import asyncio
 import logging
+from bisect import bisect_left
 from datetime import datetime
 from typing import Dict, Optional
+import aiohttp
 import sys
 import os
 
@@ -22,16 +25,47 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Produits TEMPO reconnus (ensembles pour des tests d'appartenance en O(1))
+TEMPO_PRODUCTS = frozenset(('no2', 'hcho', 'o3', 'aerosol'))
+TEMPO_COMPARABLE_PRODUCTS = frozenset(('no2', 'hcho', 'o3'))
+
+# Recommandations de santé par catégorie d'AQI (bornes supérieures incluses), construites
+# une fois à l'import et partagées entre les requêtes : ne pas les modifier
+AQI_CATEGORY_BOUNDS = (50, 100, 150)
+HEALTH_RECOMMENDATIONS = (
+    {
+        'general': 'Qualité air excellente. Activités extérieures recommandées.',
+        'sensitive': 'Aucune restriction pour les personnes sensibles.',
+        'activities': 'Toutes activités extérieures possibles.'
+    },
+    {
+        'general': 'Qualité air acceptable. Activités normales possibles.',
+        'sensitive': 'Personnes sensibles peuvent ressentir de légers effets.',
+        'activities': 'Activités extérieures généralement sûres.'
+    },
+    {
+        'general': 'Malsain pour groupes sensibles.',
+        'sensitive': 'Éviter les activités extérieures prolongées.',
+        'activities': 'Réduire les activités intenses à l\'extérieur.'
+    },
+    {
+        'general': 'Qualité air malsaine. Limiter exposition extérieure.',
+        'sensitive': 'Rester à l\'intérieur. Éviter toute activité extérieure.',
+        'activities': 'Activités extérieures fortement déconseillées.'
+    }
+)
+
 class HybridTEMPOService:
     """
     Service hybride intelligent combinant TEMPO + APIs Open Source
     Fournit les vraies concentrations ET la validation TEMPO
     """
     
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        # session : pool HTTP partagé de l'application, réutilisé par les collecteurs
         self.tempo_client = TempoLatestDataClient()
-        self.open_source_collector = OpenSourceAPICollector()
-        self.weather_client = OpenWeatherClient()
+        self.open_source_collector = OpenSourceAPICollector(session)
+        self.weather_client = OpenWeatherClient(session)
         
     async def get_comprehensive_air_quality(self, lat: float, lon: float) -> Dict:
         """
@@ -40,17 +74,14 @@ class HybridTEMPOService:
         logger.info(f"🎯 Analyse complète qualité air TEMPO+APIs: {lat}, {lon}")
         
         try:
-            # 1. Données TEMPO (validation/métadonnées)
-            logger.info("🛰️ Récupération métadonnées TEMPO...")
-            tempo_data = await self.tempo_client.get_latest_available_data(lat, lon)
-            
-            # 2. APIs Open Source (concentrations réelles)
-            logger.info("🌍 Récupération concentrations APIs Open Source...")
-            open_source_data = await self.open_source_collector.get_all_available_data(lat, lon)
-            
-            # 3. Données météo
-            logger.info("🌤️ Récupération données météo...")
-            weather_data = await self.weather_client.get_weather_data(lat, lon)
+            # 1-3. TEMPO (validation/métadonnées), APIs Open Source (concentrations
+            # réelles) et météo sont indépendants: récupération en parallèle
+            logger.info("🛰️🌍🌤️ Récupération TEMPO, APIs Open Source et météo en parallèle...")
+            tempo_data, open_source_data, weather_data = await asyncio.gather(
+                self.tempo_client.get_latest_available_data(lat, lon),
+                self.open_source_collector.get_all_available_data(lat, lon),
+                self.weather_client.get_weather_data(lat, lon)
+            )
             
             # 4. Synthèse intelligente
             comprehensive_data = self._create_comprehensive_response(
@@ -63,7 +94,21 @@ class HybridTEMPOService:
         except Exception as e:
             logger.error(f"❌ Erreur service hybride: {e}")
             return self._error_response(lat, lon, str(e))
-    
+
+    async def get_open_source_air_quality(self, lat: float, lon: float) -> Dict:
+        """
+        Même réponse sans TEMPO (APIs Open Source + météo) : mode dégradé quand TEMPO est en panne
+        """
+        try:
+            open_source_data, weather_data = await asyncio.gather(
+                self.open_source_collector.get_all_available_data(lat, lon),
+                self.weather_client.get_weather_data(lat, lon)
+            )
+            return self._create_comprehensive_response({}, open_source_data, weather_data, lat, lon)
+        except Exception as e:
+            logger.error(f"❌ Erreur service hybride (sans TEMPO): {e}")
+            return self._error_response(lat, lon, str(e))
+
     def _create_comprehensive_response(self, tempo_data: Dict, open_source_data: Dict, 
                                      weather_data: Dict, lat: float, lon: float) -> Dict:
         """
@@ -113,7 +158,7 @@ class HybridTEMPOService:
         if tempo_data:
             response['tempo_validation'] = {
                 'satellite_coverage': True,
-                'available_products': list([k for k in tempo_data.keys() if k in ['no2', 'hcho', 'o3', 'aerosol']]),
+                'available_products': [k for k in tempo_data if k in TEMPO_PRODUCTS],
                 'search_period_days': tempo_data.get('search_period_days', 7),
                 'latest_satellite_pass': self._get_latest_tempo_date(tempo_data),
                 'data_quality': 'NASA Official Satellite Data',
@@ -239,7 +284,7 @@ class HybridTEMPOService:
     def _compare_tempo_vs_ground(self, tempo_data: Dict, ground_pollutants: Dict) -> Optional[Dict]:
         """Compare les données TEMPO vs stations au sol (si applicable)"""
         # Pour l'instant, simple indication de disponibilité
-        tempo_available = len([k for k in tempo_data.keys() if k in ['no2', 'hcho', 'o3']]) 
+        tempo_available = len(tempo_data.keys() & TEMPO_COMPARABLE_PRODUCTS)
         ground_available = len(ground_pollutants)
         
         if tempo_available > 0 and ground_available > 0:
@@ -254,31 +299,7 @@ class HybridTEMPOService:
     def _generate_health_recommendations(self, air_quality: Dict) -> Dict:
         """Génère des recommandations de santé basées sur l'AQI"""
         aqi = air_quality.get('aqi', 50)
-        
-        if aqi <= 50:
-            return {
-                'general': 'Qualité air excellente. Activités extérieures recommandées.',
-                'sensitive': 'Aucune restriction pour les personnes sensibles.',
-                'activities': 'Toutes activités extérieures possibles.'
-            }
-        elif aqi <= 100:
-            return {
-                'general': 'Qualité air acceptable. Activités normales possibles.',
-                'sensitive': 'Personnes sensibles peuvent ressentir de légers effets.',
-                'activities': 'Activités extérieures généralement sûres.'
-            }
-        elif aqi <= 150:
-            return {
-                'general': 'Malsain pour groupes sensibles.',
-                'sensitive': 'Éviter les activités extérieures prolongées.',
-                'activities': 'Réduire les activités intenses à l\'extérieur.'
-            }
-        else:
-            return {
-                'general': 'Qualité air malsaine. Limiter exposition extérieure.',
-                'sensitive': 'Rester à l\'intérieur. Éviter toute activité extérieure.',
-                'activities': 'Activités extérieures fortement déconseillées.'
-            }
+        return HEALTH_RECOMMENDATIONS[bisect_left(AQI_CATEGORY_BOUNDS, aqi)]
     
     def _calculate_overall_confidence(self, tempo_data: Dict, open_source_data: Dict) -> str:
         """Calcule le niveau de confiance global"""
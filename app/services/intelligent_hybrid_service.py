@@ -15,6 +15,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 import logging
 
+import numpy as np
+
 # Import des vrais connecteurs existants
 try:
     from app.connectors.nasa_tempo_connector import NASATempoConnector
@@ -25,6 +27,52 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Modèle de prévision : ordre des polluants et, par polluant, coefficient du cycle
+# trafic (time_factor), du cycle solaire et demi-largeur du bruit uniforme
+FORECAST_POLLUTANTS = ('pm25', 'pm10', 'no2', 'o3', 'so2', 'co')
+FORECAST_TIME_COEF = np.array([0.3, 0.3, 0.4, 0.0, 0.0, 0.0])
+FORECAST_SOLAR_COEF = np.array([0.0, 0.0, 0.0, 0.5, 0.0, 0.0])
+FORECAST_NOISE_WIDTH = np.array([0.2, 0.2, 0.25, 0.2, 0.15, 0.15])
+# Niveaux (pm25, pm10, no2) correspondant à un AQI de 100
+AQI_REFERENCE_LEVELS = np.array([35.4, 154.0, 100.0])
+
+# Grandes métropoles mondiales (populations > 5M), tabulées une fois à l'import
+MAJOR_CITIES = (
+    # Amérique du Nord
+    (40.7128, -74.0060, "New York"), (34.0522, -118.2437, "Los Angeles"),
+    (41.8781, -87.6298, "Chicago"), (43.6532, -79.3832, "Toronto"),
+    
+    # Europe
+    (51.5074, -0.1278, "London"), (48.8566, 2.3522, "Paris"),
+    (52.5200, 13.4050, "Berlin"), (41.9028, 12.4964, "Rome"),
+    
+    # Asie
+    (35.6762, 139.6503, "Tokyo"), (39.9042, 116.4074, "Beijing"),
+    (31.2304, 121.4737, "Shanghai"), (28.7041, 77.1025, "Delhi"),
+    
+    # Amérique du Sud
+    (-23.5505, -46.6333, "São Paulo"), (-34.6118, -58.3960, "Buenos Aires"),
+    
+    # Afrique
+    (30.0444, 31.2357, "Cairo"), (-26.2041, 28.0473, "Johannesburg"),
+    
+    # Océanie
+    (-33.8688, 151.2093, "Sydney"), (-37.8136, 144.9631, "Melbourne")
+)
+MAJOR_CITY_COORDS = np.array([(city_lat, city_lon) for city_lat, city_lon, _ in MAJOR_CITIES])
+URBAN_RADIUS_DEG = 1.0  # ~100km
+
+# Fallback intelligent : demi-largeur du bruit uniforme par polluant (ordre FORECAST_POLLUTANTS)
+FALLBACK_NOISE_WIDTH = np.array([2.0, 3.0, 3.0, 8.0, 1.0, 0.2])
+
+# Météo simulée : écart de température, humidité, vent, indice de direction, pression, visibilité
+WEATHER_LOWS = np.array([-5.0, 40.0, 0.0, 0.0, 995.0, 5.0])
+WEATHER_HIGHS = np.array([5.0, 90.0, 15.0, 8.0, 1030.0, 20.0])
+WIND_DIRECTIONS = ('N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW')
+
+# Générateur unique pour le module (pas de ré-initialisation par requête)
+_rng = np.random.default_rng()
+
 class IntelligentHybridService:
     """
     Service hybride qui combine vraies données NASA + fallback intelligent
@@ -338,8 +386,9 @@ class IntelligentHybridService:
         # Classification sophistiquée urbain/rural
         is_urban = self._classify_urban_area(lat, lon)
         
-        # Patterns saisonniers réels
-        season_factor = math.sin(2 * math.pi * (datetime.now().timetuple().tm_yday - 80) / 365)
+        # Patterns saisonniers réels (un seul instant de référence pour la requête)
+        now = datetime.now()
+        season_factor = math.sin(2 * math.pi * (now.timetuple().tm_yday - 80) / 365)
         
         # Facteur géographique (pollution vs latitude)
         geo_factor = self._get_geographic_pollution_factor(lat, lon)
@@ -354,19 +403,21 @@ class IntelligentHybridService:
             base_no2 = 8 + geo_factor * 5 + season_factor * 3
         
         # Variations temporelles réalistes
-        hour_factor = math.sin(2 * math.pi * datetime.now().hour / 24)
+        hour_factor = math.sin(2 * math.pi * now.hour / 24)
         
+        # Bruit de tous les polluants (ordre FORECAST_POLLUTANTS) en un seul tirage
+        noise = _rng.uniform(-FALLBACK_NOISE_WIDTH, FALLBACK_NOISE_WIDTH).tolist()
         pollutants = {
-            'pm25': max(0, base_pm25 + hour_factor * 3 + random.uniform(-2, 2)),
-            'pm10': max(0, base_pm25 * 1.6 + hour_factor * 4 + random.uniform(-3, 3)),
-            'no2': max(0, base_no2 + hour_factor * 8 + random.uniform(-3, 3)),
-            'o3': max(0, 45 + season_factor * 15 - hour_factor * 5 + random.uniform(-8, 8)),
-            'so2': max(0, 3 + geo_factor * 4 + random.uniform(-1, 1)),
-            'co': max(0, 0.8 + geo_factor * 0.6 + random.uniform(-0.2, 0.2))
+            'pm25': max(0, base_pm25 + hour_factor * 3 + noise[0]),
+            'pm10': max(0, base_pm25 * 1.6 + hour_factor * 4 + noise[1]),
+            'no2': max(0, base_no2 + hour_factor * 8 + noise[2]),
+            'o3': max(0, 45 + season_factor * 15 - hour_factor * 5 + noise[3]),
+            'so2': max(0, 3 + geo_factor * 4 + noise[4]),
+            'co': max(0, 0.8 + geo_factor * 0.6 + noise[5])
         }
         
         aqi = self._calculate_aqi(pollutants)
-        weather = await self._get_weather_data(lat, lon)
+        weather = await self._get_weather_data(lat, lon, now)
         
         return {
             "name": location_name,
@@ -390,37 +441,9 @@ class IntelligentHybridService:
     
     def _classify_urban_area(self, lat: float, lon: float) -> bool:
         """Classification sophistiquée urbain/rural basée sur données réelles"""
-        # Grandes métropoles mondiales (populations > 5M)
-        major_cities = [
-            # Amérique du Nord
-            (40.7128, -74.0060, "New York"), (34.0522, -118.2437, "Los Angeles"),
-            (41.8781, -87.6298, "Chicago"), (43.6532, -79.3832, "Toronto"),
-            
-            # Europe
-            (51.5074, -0.1278, "London"), (48.8566, 2.3522, "Paris"),
-            (52.5200, 13.4050, "Berlin"), (41.9028, 12.4964, "Rome"),
-            
-            # Asie
-            (35.6762, 139.6503, "Tokyo"), (39.9042, 116.4074, "Beijing"),
-            (31.2304, 121.4737, "Shanghai"), (28.7041, 77.1025, "Delhi"),
-            
-            # Amérique du Sud
-            (-23.5505, -46.6333, "São Paulo"), (-34.6118, -58.3960, "Buenos Aires"),
-            
-            # Afrique
-            (30.0444, 31.2357, "Cairo"), (-26.2041, 28.0473, "Johannesburg"),
-            
-            # Océanie
-            (-33.8688, 151.2093, "Sydney"), (-37.8136, 144.9631, "Melbourne")
-        ]
-        
-        # Vérifier proximité des grandes villes (rayon 100km)
-        for city_lat, city_lon, name in major_cities:
-            distance = ((lat - city_lat)**2 + (lon - city_lon)**2)**0.5
-            if distance < 1.0:  # ~100km
-                return True
-        
-        return False
+        # Proximité d'une grande ville (rayon ~100km) : une passe vectorisée sur la table
+        distances = np.hypot(MAJOR_CITY_COORDS[:, 0] - lat, MAJOR_CITY_COORDS[:, 1] - lon)
+        return bool(distances.min() < URBAN_RADIUS_DEG)
     
     def _get_geographic_pollution_factor(self, lat: float, lon: float) -> float:
         """Facteur de pollution basé sur la géographie"""
@@ -463,21 +486,26 @@ class IntelligentHybridService:
         
         return f"Location {lat:.3f}, {lon:.3f}"
     
-    async def _get_weather_data(self, lat: float, lon: float) -> Dict[str, Any]:
-        """Génère des données météo réalistes"""
+    async def _get_weather_data(self, lat: float, lon: float, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Génère des données météo réalistes (now : instant de référence de la requête)"""
+        now = now or datetime.now()
         # Facteurs saisonniers et géographiques
-        season = math.sin(2 * math.pi * (datetime.now().timetuple().tm_yday - 80) / 365)
+        season = math.sin(2 * math.pi * (now.timetuple().tm_yday - 80) / 365)
         lat_factor = 1 - abs(lat) / 90
         
         base_temp = 15 + season * 15 + lat_factor * 10
         
+        # Toutes les grandeurs météo en un seul tirage (bornes WEATHER_LOWS / WEATHER_HIGHS)
+        temp_offset, humidity, wind_speed, direction, pressure, visibility = (
+            _rng.uniform(WEATHER_LOWS, WEATHER_HIGHS).tolist()
+        )
         return {
-            'temperature': base_temp + random.uniform(-5, 5),
-            'humidity': max(20, min(100, random.uniform(40, 90))),
-            'windSpeed': max(0, random.uniform(0, 15)),
-            'windDirection': random.choice(['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']),
-            'pressure': random.uniform(995, 1030),
-            'visibility': random.uniform(5, 20)
+            'temperature': base_temp + temp_offset,
+            'humidity': humidity,
+            'windSpeed': wind_speed,
+            'windDirection': WIND_DIRECTIONS[int(direction)],
+            'pressure': pressure,
+            'visibility': visibility
         }
     
     def _calculate_aqi(self, pollutants: Dict[str, float]) -> int:
@@ -504,66 +532,59 @@ class IntelligentHybridService:
             'co': current_data.get('co', 1.0)
         }
         
-        predictions = []
+        # Un seul instant de référence pour toute la requête (heures, horodatages, métadonnées)
+        now = datetime.now()
+        now_hour = now.hour
+        
+        # Toutes les heures d'un coup : vecteur d'heures, une matrice de bruit (polluant x heure)
+        h = np.arange(1, hours + 1)
+        time_factor = np.sin(2 * np.pi * (now_hour + h) / 24)
+        solar_factor = np.maximum(0, np.sin(np.pi * (now_hour + h - 6) / 12))
+        weather_impact = _rng.uniform(0.8, 1.2, hours)
+        noise = _rng.uniform(-1.0, 1.0, (len(FORECAST_POLLUTANTS), hours)) * FORECAST_NOISE_WIDTH[:, None]
+        variations = (1 + FORECAST_TIME_COEF[:, None] * time_factor
+                      + FORECAST_SOLAR_COEF[:, None] * solar_factor + noise)
+        base_values = np.array([base_pollutants[p] for p in FORECAST_POLLUTANTS])
+        values = np.maximum(0, base_values[:, None] * variations * weather_impact)
+        
+        # Calcul AQI prédit (même formule que _calculate_aqi, sur tout l'horizon)
+        sub_indices = np.minimum(values[:3] / AQI_REFERENCE_LEVELS[:, None] * 100, 300)
+        pred_aqi = np.maximum(sub_indices.max(axis=0), 20).astype(int)
+        
+        # Confiance basée sur horizon temporel et sources de données
+        if current_data.get('dataSource', '').startswith('NASA'):
+            base_confidence = 0.95
+        elif 'OpenAQ' in current_data.get('dataSource', ''):
+            base_confidence = 0.85
+        else:
+            base_confidence = 0.70
         
-        for hour in range(1, hours + 1):
-            # Patterns temporels basés sur observations NASA
-            time_factor = math.sin(2 * math.pi * (datetime.now().hour + hour) / 24)
-            
-            # Facteurs météorologiques
-            weather_impact = random.uniform(0.8, 1.2)
-            
-            # Variations spécifiques par polluant (basées sur littérature scientifique)
-            pred_pollutants = {}
-            for pollutant, base_value in base_pollutants.items():
-                if pollutant in ['pm25', 'pm10']:
-                    # PM suit les patterns de trafic
-                    variation = 1 + (time_factor * 0.3) + random.uniform(-0.2, 0.2)
-                elif pollutant == 'no2':
-                    # NO2 corrélé au trafic urbain
-                    variation = 1 + (time_factor * 0.4) + random.uniform(-0.25, 0.25)
-                elif pollutant == 'o3':
-                    # O3 suit le cycle solaire
-                    solar_factor = max(0, math.sin(math.pi * (datetime.now().hour + hour - 6) / 12))
-                    variation = 1 + (solar_factor * 0.5) + random.uniform(-0.2, 0.2)
-                else:
-                    variation = 1 + random.uniform(-0.15, 0.15)
-                
-                pred_pollutants[pollutant] = max(0, base_value * variation * weather_impact)
-            
-            # Calcul AQI prédit
-            pred_aqi = self._calculate_aqi(pred_pollutants)
-            
-            # Confiance basée sur horizon temporel et sources de données
-            if current_data.get('dataSource', '').startswith('NASA'):
-                base_confidence = 0.95
-            elif 'OpenAQ' in current_data.get('dataSource', ''):
-                base_confidence = 0.85
-            else:
-                base_confidence = 0.70
-            
-            confidence = max(0.4, base_confidence - (hour * 0.02))
-            
-            predictions.append({
+        confidence = np.maximum(0.4, base_confidence - h * 0.02).round(2)
+        
+        rounded = values.round(1)
+        rounded[-1] = values[-1].round(2)  # CO en ppm, 2 décimales
+        columns = dict(zip(FORECAST_POLLUTANTS, rounded.tolist()))
+        predictions = [
+            {
                 "hour": hour,
-                "timestamp": (datetime.now() + timedelta(hours=hour)).isoformat() + "Z",
-                "pm25": round(pred_pollutants['pm25'], 1),
-                "pm10": round(pred_pollutants['pm10'], 1),
-                "no2": round(pred_pollutants['no2'], 1),
-                "o3": round(pred_pollutants['o3'], 1),
-                "so2": round(pred_pollutants['so2'], 1),
-                "co": round(pred_pollutants['co'], 2),
-                "aqi": pred_aqi,
-                "confidence": round(confidence, 2)
-            })
-        
-        # Calculs de résumé
-        avg_aqi = sum(p['aqi'] for p in predictions) / len(predictions)
+                "timestamp": (now + timedelta(hours=hour)).isoformat() + "Z",
+                "pm25": pm25, "pm10": pm10, "no2": no2, "o3": o3, "so2": so2, "co": co,
+                "aqi": aqi,
+                "confidence": conf
+            }
+            for hour, pm25, pm10, no2, o3, so2, co, aqi, conf in zip(
+                h.tolist(), columns['pm25'], columns['pm10'], columns['no2'], columns['o3'],
+                columns['so2'], columns['co'], pred_aqi.tolist(), confidence.tolist()
+            )
+        ]
+        
+        # Calculs de résumé : réductions directes sur le vecteur AQI, sans parcourir predictions
+        final_aqi = int(pred_aqi[-1])
         current_aqi = current_data.get('aqi', 50)
         
-        if abs(predictions[-1]['aqi'] - current_aqi) < 10:
+        if abs(final_aqi - current_aqi) < 10:
             trend = "stable"
-        elif predictions[-1]['aqi'] < current_aqi:
+        elif final_aqi < current_aqi:
             trend = "improving"
         else:
             trend = "worsening"
@@ -581,21 +602,21 @@ class IntelligentHybridService:
                 "o3": current_data.get('o3'),
                 "so2": current_data.get('so2'),
                 "co": current_data.get('co'),
-                "timestamp": datetime.now().isoformat() + "Z"
+                "timestamp": now.isoformat() + "Z"
             },
             "forecast": predictions,
             "summary": {
                 "forecast_hours": hours,
-                "avg_aqi": round(avg_aqi, 1),
-                "max_aqi": max(p['aqi'] for p in predictions),
-                "min_aqi": min(p['aqi'] for p in predictions),
+                "avg_aqi": round(float(pred_aqi.mean()), 1),
+                "max_aqi": int(pred_aqi.max()),
+                "min_aqi": int(pred_aqi.min()),
                 "trend": trend
             },
             "metadata": {
                 "base_data_source": current_data.get('dataSource', 'Unknown'),
                 "prediction_model": "NASA-Pattern Based Forecast",
                 "confidence": "High" if 'NASA' in current_data.get('dataSource', '') else "Medium",
-                "last_updated": datetime.now().isoformat() + "Z"
+                "last_updated": now.isoformat() + "Z"
             }
         }
     
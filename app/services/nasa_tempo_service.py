@@ -18,6 +18,17 @@ from app.connectors.nasa_tempo_connector import NASATempoConnector
 
 logger = logging.getLogger(__name__)
 
+# Major North American cities (simplified), built once at import
+MAJOR_CITY_COORDS = np.array([
+    (40.7128, -74.0060),  # New York
+    (34.0522, -118.2437), # Los Angeles
+    (41.8781, -87.6298),  # Chicago
+    (43.6532, -79.3832),  # Toronto
+    (49.2827, -123.1207), # Vancouver
+    (45.5017, -73.5673),  # Montreal
+])
+URBAN_RADIUS_DEG = 0.5  # ~50km
+
 class NASATempoService:
     """NASA TEMPO real-time air quality data service"""
     
@@ -291,23 +302,9 @@ class NASATempoService:
     
     async def _is_urban_area(self, latitude: float, longitude: float) -> bool:
         """Simple urban/rural classification based on coordinates"""
-        # Major North American cities (simplified)
-        major_cities = [
-            (40.7128, -74.0060),  # New York
-            (34.0522, -118.2437), # Los Angeles
-            (41.8781, -87.6298),  # Chicago
-            (43.6532, -79.3832),  # Toronto
-            (49.2827, -123.1207), # Vancouver
-            (45.5017, -73.5673),  # Montreal
-        ]
-        
-        # Check if within 50km of major city
-        for city_lat, city_lon in major_cities:
-            distance = np.sqrt((latitude - city_lat)**2 + (longitude - city_lon)**2)
-            if distance < 0.5:  # ~50km
-                return True
-        
-        return False
+        # Check if within 50km of major city (one vectorized pass over the table)
+        distances = np.hypot(MAJOR_CITY_COORDS[:, 0] - latitude, MAJOR_CITY_COORDS[:, 1] - longitude)
+        return bool(distances.min() < URBAN_RADIUS_DEG)
     
     async def _fetch_aqicn_data(self, latitude: float, longitude: float) -> Optional[Dict[str, float]]:
         """Fetch data from AQICN API"""
@@ -3,16 +3,91 @@ Service de qualité de l'air intégrant des données réelles
 Utilise multiple sources : NASA TEMPO, OpenAQ, NOAA, WHO Global Air Quality
 """
 
+from bisect import bisect_left
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 import asyncio
+import time
+import numpy as np
 
-from ..connectors.real_data_connector import RealDataConnector
+from ..connectors.real_data_connector import (
+    HISTORICAL_POLLUTANTS, RealDataConnector, columns_to_rows, rows_to_columns
+)
 from .geolocation_service import geolocation_service
+from ._forecast_kernels import FORECAST_POLLUTANTS, forecast_kernel
+from ._numerics import ISO_UTC_FORMAT, calculate_aqi, calculate_aqi_batch, iso_utc, thread_rng
 
 logger = logging.getLogger(__name__)
 
+# Recommandations de santé par catégorie AQI (EPA), construites une seule fois ;
+# AQI_CATEGORY_BOUNDS donne la borne haute incluse de chaque catégorie
+AQI_CATEGORY_BOUNDS = (50, 100, 150, 200, 300)
+HEALTH_RECOMMENDATIONS = (
+    {
+        "level": "Good",
+        "color": "green",
+        "message": "Air quality is satisfactory and poses little or no health risk",
+        "activities": "Normal outdoor activities recommended for everyone",
+        "sensitive_groups": "No restrictions"
+    },
+    {
+        "level": "Moderate",
+        "color": "yellow", 
+        "message": "Air quality is acceptable, but may be a concern for sensitive individuals",
+        "activities": "Normal activities for most people; sensitive individuals should limit prolonged outdoor exertion",
+        "sensitive_groups": "People with heart or lung disease, older adults, and children should limit prolonged outdoor exertion"
+    },
+    {
+        "level": "Unhealthy for Sensitive Groups",
+        "color": "orange",
+        "message": "Sensitive groups may experience health effects",
+        "activities": "Reduce prolonged outdoor exertion, especially for sensitive groups",
+        "sensitive_groups": "People with heart or lung disease, older adults, and children should avoid prolonged outdoor exertion"
+    },
+    {
+        "level": "Unhealthy",
+        "color": "red",
+        "message": "Everyone may begin to experience health effects",
+        "activities": "Avoid prolonged outdoor exertion; everyone should reduce outdoor activities",
+        "sensitive_groups": "People with heart or lung disease, older adults, and children should avoid outdoor activities"
+    },
+    {
+        "level": "Very Unhealthy",
+        "color": "purple",
+        "message": "Health warnings of emergency conditions",
+        "activities": "Avoid all outdoor activities",
+        "sensitive_groups": "Everyone should avoid all outdoor exertion"
+    },
+    {
+        "level": "Hazardous",
+        "color": "maroon",
+        "message": "Health alert - everyone may experience serious health effects",
+        "activities": "Remain indoors and avoid all outdoor activities",
+        "sensitive_groups": "Everyone should remain indoors with air filtration if possible"
+    }
+)
+
+# Valeurs par défaut des mesures historiques de fallback (ordre des champs d'une mesure)
+FALLBACK_HISTORICAL_VALUES = {
+    'aqi': 50, 'pm25': 10.0, 'pm10': 15.0, 'no2': 15.0, 'o3': 60.0, 'so2': 5.0, 'co': 1.0
+}
+
+# Prédictions en cache au plus (cellule ~1 km x horizon x format), en LRU
+FORECAST_CACHE_MAX_ENTRIES = 4096
+
+def _measurement_count(measurements) -> int:
+    """Nombre de mesures, en lignes (liste) comme en colonnes (dict de tableaux)"""
+    if isinstance(measurements, dict):
+        return len(measurements.get('timestamp', ()))
+    return len(measurements)
+
+def _upper_median(values: np.ndarray):
+    """Élément de rang n//2 (médiane haute, comme sorted(values)[n // 2]) par sélection O(n)"""
+    middle = values.size // 2
+    return np.partition(values, middle)[middle].item()
+
 class RealAirQualityService:
     """Service principal pour les données de qualité de l'air réelles"""
     
@@ -20,6 +95,8 @@ class RealAirQualityService:
         self.connector = RealDataConnector()
         self.cache = {}  # Cache simple pour éviter les appels répétés
         self.cache_duration = 300  # 5 minutes de cache
+        # Prédictions : LRU borné (une entrée par cellule, horizon et format)
+        self.forecast_cache: OrderedDict = OrderedDict()
     
     def _get_cache_key(self, *args) -> str:
         """Génère une clé de cache"""
@@ -47,16 +124,16 @@ class RealAirQualityService:
         
         try:
             async with self.connector as conn:
-                # Récupérer les données de qualité de l'air
-                air_quality_data = await conn.get_current_air_quality(latitude, longitude)
-                
-                # Récupérer les données météorologiques
-                weather_data = await conn.get_weather_data(latitude, longitude)
+                # Qualité de l'air, météo et géolocalisation sont indépendantes : lancées
+                # ensemble, la latence est celle de l'appel le plus lent, pas leur somme
+                air_quality_data, weather_data, (enhanced_location_name, location_info) = await asyncio.gather(
+                    conn.get_current_air_quality(latitude, longitude),
+                    conn.get_weather_data(latitude, longitude),
+                    self._resolve_location(latitude, longitude)
+                )
                 
-                # NOUVELLE GÉOLOCALISATION PERFORMANTE
-                async with geolocation_service as geo_service:
-                    enhanced_location_name = await geo_service.get_enhanced_location_name(latitude, longitude)
-                    location_info = geo_service.get_location_info(latitude, longitude)
+                # Une seule lecture de l'horloge pour l'horodatage et l'entrée de cache
+                now = time.time()
                 
                 # Combiner les données avec le nouveau nom de localisation
                 result = {
@@ -66,13 +143,13 @@ class RealAirQualityService:
                     'location_info': location_info,  # Informations supplémentaires sur la localisation
                     'data_sources': self._get_data_sources_info(air_quality_data, weather_data),
                     'health_recommendations': self._get_health_recommendations(air_quality_data.get('aqi', 50)),
-                    'last_updated': datetime.utcnow().isoformat() + "Z"
+                    'last_updated': iso_utc(int(now))
                 }
                 
                 # Mettre en cache
                 self.cache[cache_key] = {
                     'data': result,
-                    'cached_at': datetime.now()
+                    'cached_at': datetime.fromtimestamp(now)
                 }
                 
                 logger.info(f"✅ Données actuelles récupérées pour {enhanced_location_name} - AQI: {result.get('aqi', 'N/A')}")
@@ -83,18 +160,42 @@ class RealAirQualityService:
             # Fallback vers des données par défaut
             return await self._get_fallback_current_data(latitude, longitude)
     
-    async def get_forecast_data(self, latitude: float, longitude: float, hours: int = 24) -> Dict:
+    async def _resolve_location(self, latitude: float, longitude: float) -> Tuple[str, Dict]:
+        """Nom de lieu (géolocalisation performante) et informations de localisation"""
+        async with geolocation_service as geo_service:
+            enhanced_location_name = await geo_service.get_enhanced_location_name(latitude, longitude)
+            return enhanced_location_name, geo_service.get_location_info(latitude, longitude)
+    
+    async def get_forecast_data(self, latitude: float, longitude: float, hours: int = 24,
+                                layout: str = 'rows') -> Dict:
         """
         Génère des prédictions de qualité de l'air basées sur les données actuelles réelles
+        
+        layout='rows' : une liste de points horaires ; layout='columns' : un tableau
+        NumPy par champ (SoA), sérialisable directement par orjson
         """
+        # Les prédictions ne changent qu'à la frontière de l'heure : cache par position
+        # arrondie (~1 km) et nombre d'heures, valide tant que l'heure courante est la même
+        cache_key = self._get_cache_key("forecast", round(latitude, 2), round(longitude, 2), hours, layout)
+        hour_bucket = int(time.time() // 3600)
+        cache_entry = self.forecast_cache.get(cache_key)
+        if cache_entry and cache_entry.get('hour_bucket') == hour_bucket:
+            self.forecast_cache.move_to_end(cache_key)
+            logger.info(f"📋 Cache hit for forecast at {latitude:.3f}, {longitude:.3f} ({hours}h)")
+            return cache_entry['data']
+        
         try:
             # Récupérer les données actuelles comme base
             current_data = await self.get_current_air_quality(latitude, longitude)
             
             # Générer les prédictions basées sur les valeurs réelles
-            forecast = self._generate_realistic_forecast(current_data, hours)
+            if layout == 'columns':
+                forecast = self._forecast_columns(current_data, hours)
+            else:
+                forecast = self._generate_realistic_forecast(current_data, hours)
             
-            # Préparer la réponse
+            # Préparer la réponse (horloge lue une fois, après la récupération des données)
+            now = time.time()
             result = {
                 'location': {
                     'name': current_data.get('name', f"Location {latitude:.3f}, {longitude:.3f}"),
@@ -119,45 +220,51 @@ class RealAirQualityService:
                     'model': 'Real-time Enhanced Forecast Model',
                     'base_data_source': current_data.get('data_source', 'Multiple Sources'),
                     'confidence': self._calculate_forecast_confidence(current_data),
-                    'last_updated': datetime.now().isoformat() + "Z",
+                    'last_updated': iso_utc(int(now)),
                     'note': 'Predictions based on real-time measurements and meteorological patterns'
                 }
             }
             
+            # Mettre en cache (l'entrée remplace celle de l'heure précédente pour la même
+            # clé ; au-delà de FORECAST_CACHE_MAX_ENTRIES, la moins récemment utilisée sort)
+            self.forecast_cache[cache_key] = {
+                'data': result,
+                'cached_at': datetime.fromtimestamp(now),
+                'hour_bucket': hour_bucket
+            }
+            self.forecast_cache.move_to_end(cache_key)
+            if len(self.forecast_cache) > FORECAST_CACHE_MAX_ENTRIES:
+                self.forecast_cache.popitem(last=False)
+            
             logger.info(f"🔮 Prédictions générées pour {current_data.get('name', 'Location')} - {hours}h")
             return result
             
         except Exception as e:
             logger.error(f"❌ Erreur lors de la génération des prédictions: {e}")
-            return await self._get_fallback_forecast_data(latitude, longitude, hours)
+            return await self._get_fallback_forecast_data(latitude, longitude, hours, layout)
     
     async def get_historical_data(self, latitude: float, longitude: float, 
                                 start_date: datetime, end_date: datetime,
-                                pollutant: Optional[str] = None) -> Dict:
+                                pollutant: Optional[str] = None, layout: str = 'rows') -> Dict:
         """
         Récupère les données historiques réelles de qualité de l'air
+        layout='columns' : mesures en colonnes (un tableau par champ) au lieu d'une liste de points
         """
         try:
             async with self.connector as conn:
-                # Récupérer les données historiques
-                historical_measurements = await conn.get_historical_data(
-                    latitude, longitude, start_date, end_date
+                # Récupérer les données historiques, toujours en colonnes
+                columns = await conn.get_historical_data(
+                    latitude, longitude, start_date, end_date, 'columns'
                 )
                 
-                # Filtrer par polluant si spécifié
-                if pollutant and pollutant.lower() in ['pm25', 'pm10', 'no2', 'o3', 'so2', 'co']:
-                    filtered_measurements = []
-                    for measurement in historical_measurements:
-                        filtered_measurement = {
-                            'timestamp': measurement['timestamp'],
-                            'aqi': measurement['aqi'],
-                            pollutant.lower(): measurement.get(pollutant.lower(), 0)
-                        }
-                        filtered_measurements.append(filtered_measurement)
-                    historical_measurements = filtered_measurements
+                # Filtrer par polluant si spécifié : projection des colonnes demandées,
+                # les autres polluants ne sont jamais matérialisés en lignes
+                if pollutant and pollutant.lower() in HISTORICAL_POLLUTANTS:
+                    columns = {key: columns[key] for key in ('timestamp', 'aqi', pollutant.lower())}
+                historical_measurements = columns if layout == 'columns' else columns_to_rows(columns)
                 
                 # Calculer les statistiques
-                statistics = self._calculate_historical_statistics(historical_measurements, pollutant)
+                statistics = self._calculate_historical_statistics(columns, pollutant)
                 
                 # Obtenir le nom de la localisation avec le nouveau service
                 async with geolocation_service as geo_service:
@@ -174,167 +281,143 @@ class RealAirQualityService:
                         'start_date': start_date.isoformat() + "Z",
                         'end_date': end_date.isoformat() + "Z",
                         'total_days': (end_date - start_date).days + 1,
-                        'data_points': len(historical_measurements)
+                        'data_points': _measurement_count(columns)
                     },
                     'measurements': historical_measurements,
                     'statistics': statistics,
                     'metadata': {
                         'pollutant_filter': pollutant if pollutant else 'all',
                         'data_sources': ['OpenAQ Ground Stations', 'NASA TEMPO Estimates', 'Regional Models'],
-                        'data_quality': self._assess_data_quality(historical_measurements),
-                        'generated_at': datetime.now().isoformat() + "Z"
+                        'data_quality': self._assess_data_quality(columns),
+                        'generated_at': iso_utc(int(time.time()))
                     }
                 }
                 
-                logger.info(f"📊 Données historiques récupérées: {len(historical_measurements)} points pour {latitude:.3f}, {longitude:.3f}")
+                logger.info(f"📊 Données historiques récupérées: {_measurement_count(columns)} points pour {latitude:.3f}, {longitude:.3f}")
                 return result
                 
         except Exception as e:
             logger.error(f"❌ Erreur lors de la récupération des données historiques: {e}")
-            return await self._get_fallback_historical_data(latitude, longitude, start_date, end_date, pollutant)
+            return await self._get_fallback_historical_data(latitude, longitude, start_date, end_date, pollutant, layout)
     
-    def _generate_realistic_forecast(self, current_data: Dict, hours: int) -> List[Dict]:
-        """Génère des prédictions réalistes basées sur les données actuelles réelles"""
-        import random
-        import math
-        
-        forecast = []
-        
-        # Valeurs de base depuis les données réelles
-        base_values = {
-            'pm25': current_data.get('pm25', 10),
-            'pm10': current_data.get('pm10', 15),
-            'no2': current_data.get('no2', 20),
-            'o3': current_data.get('o3', 60),
-            'so2': current_data.get('so2', 5),
-            'co': current_data.get('co', 1.0)
-        }
+    def _forecast_columns(self, current_data: Dict, hours: int) -> Dict:
+        """Prédictions en colonnes (SoA) : un tableau par champ, indexé par heure"""
+        # Valeurs de base depuis les données réelles (ordre de FORECAST_POLLUTANTS)
+        base_values = np.array([
+            current_data.get('pm25', 10),
+            current_data.get('pm10', 15),
+            current_data.get('no2', 20),
+            current_data.get('o3', 60),
+            current_data.get('so2', 5),
+            current_data.get('co', 1.0)
+        ], dtype=np.float64)
         
         # Données météorologiques actuelles pour la modélisation
         current_temp = current_data.get('temperature', 15)
-        current_humidity = current_data.get('humidity', 60)
         current_wind = current_data.get('wind_speed', 5)
         
-        for hour in range(1, hours + 1):
-            # Facteurs temporels
-            future_hour = (datetime.now().hour + hour) % 24
-            
-            # Variation diurne des polluants
-            diurnal_factors = {
-                'pm25': 1 + 0.3 * math.sin(2 * math.pi * (future_hour - 8) / 24),  # Pics matin/soir
-                'pm10': 1 + 0.25 * math.sin(2 * math.pi * (future_hour - 9) / 24),
-                'no2': 1 + 0.4 * (math.sin(2 * math.pi * (future_hour - 8) / 24) + 
-                                 math.sin(2 * math.pi * (future_hour - 18) / 24)),  # 2 pics trafic
-                'o3': max(0.3, math.sin(math.pi * (future_hour - 6) / 12)),  # Pic l'après-midi
-                'so2': 1 + 0.2 * math.sin(2 * math.pi * (future_hour - 10) / 24),
-                'co': 1 + 0.35 * (math.sin(2 * math.pi * (future_hour - 8) / 24) + 
-                                 math.sin(2 * math.pi * (future_hour - 18) / 24))
+        # Effet du vent (dispersion)
+        wind_factor = max(0.5, 1 - (current_wind / 20))  # Plus de vent = moins de pollution
+        
+        # Modèle numérique (variations diurnes, température, vent, bruit) calculé par le noyau
+        now_hour = datetime.now().hour
+        rng = thread_rng()
+        values, temps, confidences = forecast_kernel(
+            base_values, now_hour, float(current_temp), float(wind_factor),
+            rng.uniform(-2, 2, hours),
+            rng.uniform(0.85, 1.15, (len(FORECAST_POLLUTANTS), hours))
+        )
+        
+        # Arrondis appliqués d'un bloc par colonne (l'AQI reste calculé sur les valeurs brutes)
+        rounded = np.round(values, 1)
+        rounded[5] = np.round(values[5], 2)  # CO au centième
+        
+        # Horodatages UTC formatés depuis un epoch entier (pas de timedelta ni d'isoformat)
+        hour_offsets = np.arange(1, hours + 1)
+        base_epoch = int(time.time())
+        columns = {
+            'hour': hour_offsets,
+            'timestamp': [
+                time.strftime(ISO_UTC_FORMAT, time.gmtime(base_epoch + hour * 3600))
+                for hour in range(1, hours + 1)
+            ]
+        }
+        columns.update(zip(FORECAST_POLLUTANTS, rounded))
+        columns.update({
+            'aqi': calculate_aqi_batch(values[0], values[1], values[2]),
+            'temperature': np.round(temps, 1),
+            'confidence': np.round(confidences, 2),
+            'factors': {
+                'diurnal_hour': (now_hour + hour_offsets) % 24,
+                'meteorological': 'Temperature/Wind effects included',
+                'base_data': current_data.get('data_source', 'Real measurements')
             }
-            
-            # Facteurs météorologiques
-            # Température prédite (variation diurne simple)
-            temp_variation = 8 * math.sin(math.pi * (future_hour - 6) / 12)
-            predicted_temp = current_temp + temp_variation + random.uniform(-2, 2)
-            
-            # Effet de la température sur les polluants
-            temp_factor = 1 + (predicted_temp - current_temp) * 0.01  # 1% par degré
-            
-            # Effet du vent (dispersion)
-            wind_factor = max(0.5, 1 - (current_wind / 20))  # Plus de vent = moins de pollution
-            
-            # Calcul des valeurs prédites
-            predicted_values = {}
-            for pollutant, base_value in base_values.items():
-                # Combiner tous les facteurs
-                total_factor = diurnal_factors[pollutant] * temp_factor * wind_factor
-                
-                # Ajouter de la variabilité stochastique
-                noise = random.uniform(0.85, 1.15)
-                
-                predicted_values[pollutant] = max(0, base_value * total_factor * noise)
-            
-            # Calcul de l'AQI prédit
-            predicted_aqi = self._calculate_aqi(
-                predicted_values['pm25'], predicted_values['pm10'],
-                predicted_values['no2'], predicted_values['o3']
-            )
-            
-            # Confiance qui diminue avec le temps
-            confidence = max(0.4, 0.95 - (hour * 0.015))
-            
-            forecast_point = {
-                "hour": hour,
-                "timestamp": (datetime.now() + timedelta(hours=hour)).isoformat() + "Z",
-                "pm25": round(predicted_values['pm25'], 1),
-                "pm10": round(predicted_values['pm10'], 1),
-                "no2": round(predicted_values['no2'], 1),
-                "o3": round(predicted_values['o3'], 1),
-                "so2": round(predicted_values['so2'], 1),
-                "co": round(predicted_values['co'], 2),
-                "aqi": predicted_aqi,
-                "temperature": round(predicted_temp, 1),
-                "confidence": round(confidence, 2),
+        })
+        return columns
+    
+    def _generate_realistic_forecast(self, current_data: Dict, hours: int) -> List[Dict]:
+        """Génère des prédictions réalistes basées sur les données actuelles réelles"""
+        columns = self._forecast_columns(current_data, hours)
+        
+        # Seule la construction des points JSON reste une boucle Python
+        hour_list = columns['hour'].tolist()
+        timestamps = columns['timestamp']
+        pm25, pm10, no2, o3, so2, co = (columns[pollutant].tolist() for pollutant in FORECAST_POLLUTANTS)
+        aqi = columns['aqi'].tolist()
+        temperature = columns['temperature'].tolist()
+        confidence = columns['confidence'].tolist()
+        factors = columns['factors']
+        diurnal_hours = factors['diurnal_hour'].tolist()
+        
+        return [
+            {
+                "hour": hour_list[i],
+                "timestamp": timestamps[i],
+                "pm25": pm25[i],
+                "pm10": pm10[i],
+                "no2": no2[i],
+                "o3": o3[i],
+                "so2": so2[i],
+                "co": co[i],
+                "aqi": aqi[i],
+                "temperature": temperature[i],
+                "confidence": confidence[i],
                 "factors": {
-                    "diurnal": f"Hour {future_hour}",
-                    "meteorological": "Temperature/Wind effects included",
-                    "base_data": current_data.get('data_source', 'Real measurements')
+                    "diurnal": f"Hour {diurnal_hours[i]}",
+                    "meteorological": factors['meteorological'],
+                    "base_data": factors['base_data']
                 }
             }
-            
-            forecast.append(forecast_point)
-        
-        return forecast
+            for i in range(hours)
+        ]
     
     def _calculate_aqi(self, pm25: float, pm10: float, no2: float, o3: float) -> int:
         """Calcule l'AQI basé sur les polluants (standard EPA)"""
-        def get_aqi_value(concentration, breakpoints):
-            for c_low, c_high, aqi_low, aqi_high in breakpoints:
-                if c_low <= concentration <= c_high:
-                    return int(((aqi_high - aqi_low) / (c_high - c_low)) * (concentration - c_low) + aqi_low)
-            return 500
-        
-        # Breakpoints EPA
-        pm25_breakpoints = [
-            (0, 12, 0, 50), (12.1, 35.4, 51, 100), (35.5, 55.4, 101, 150),
-            (55.5, 150.4, 151, 200), (150.5, 250.4, 201, 300), (250.5, float('inf'), 301, 500)
-        ]
-        
-        pm10_breakpoints = [
-            (0, 54, 0, 50), (55, 154, 51, 100), (155, 254, 101, 150),
-            (255, 354, 151, 200), (355, 424, 201, 300), (425, float('inf'), 301, 500)
-        ]
-        
-        no2_breakpoints = [
-            (0, 25, 0, 50), (25.1, 50, 51, 100), (50.1, 100, 101, 150),
-            (100.1, 200, 151, 200), (200.1, 400, 201, 300), (400.1, float('inf'), 301, 500)
-        ]
-        
-        aqi_values = []
-        if pm25 > 0:
-            aqi_values.append(get_aqi_value(pm25, pm25_breakpoints))
-        if pm10 > 0:
-            aqi_values.append(get_aqi_value(pm10, pm10_breakpoints))
-        if no2 > 0:
-            aqi_values.append(get_aqi_value(no2, no2_breakpoints))
-        
-        return max(aqi_values) if aqi_values else 50
+        return calculate_aqi(pm25, pm10, no2)
     
-    def _calculate_forecast_summary(self, current_data: Dict, forecast: List[Dict]) -> Dict:
-        """Calcule un résumé des prédictions"""
-        if not forecast:
+    def _calculate_forecast_summary(self, current_data: Dict, forecast) -> Dict:
+        """Calcule un résumé des prédictions (liste de points ou colonnes)"""
+        if isinstance(forecast, dict):
+            aqi_values = np.asarray(forecast['aqi'])
+            forecast_hours = forecast['hour']
+        else:
+            aqi_values = np.fromiter((point['aqi'] for point in forecast), dtype=np.int64, count=len(forecast))
+            forecast_hours = [point['hour'] for point in forecast]
+        if not aqi_values.size:
             return {}
         
-        aqi_values = [point['aqi'] for point in forecast]
         current_aqi = current_data.get('aqi', 50)
         
+        # Réductions NumPy sur le vecteur AQI ; argmax/argmin renvoient la première
+        # occurrence, comme list.index(max(...))
         return {
-            'forecast_hours': len(forecast),
-            'avg_aqi': round(sum(aqi_values) / len(aqi_values), 1),
-            'max_aqi': max(aqi_values),
-            'min_aqi': min(aqi_values),
-            'trend': self._determine_trend(current_aqi, aqi_values[-1]),
-            'peak_pollution_hour': forecast[aqi_values.index(max(aqi_values))]['hour'],
-            'best_air_quality_hour': forecast[aqi_values.index(min(aqi_values))]['hour']
+            'forecast_hours': int(aqi_values.size),
+            'avg_aqi': round(float(aqi_values.mean()), 1),
+            'max_aqi': int(aqi_values.max()),
+            'min_aqi': int(aqi_values.min()),
+            'trend': self._determine_trend(current_aqi, int(aqi_values[-1])),
+            'peak_pollution_hour': int(forecast_hours[aqi_values.argmax()]),
+            'best_air_quality_hour': int(forecast_hours[aqi_values.argmin()])
         }
     
     def _determine_trend(self, current_aqi: int, final_aqi: int) -> str:
@@ -360,65 +443,67 @@ class RealAirQualityService:
         else:
             return "Low - Limited data availability"
     
-    def _calculate_historical_statistics(self, measurements: List[Dict], pollutant: Optional[str] = None) -> Dict:
-        """Calcule les statistiques sur les données historiques"""
-        if not measurements:
+    def _calculate_historical_statistics(self, measurements, pollutant: Optional[str] = None) -> Dict:
+        """Calcule les statistiques sur les données historiques (liste de mesures ou colonnes)"""
+        columns = measurements if isinstance(measurements, dict) else rows_to_columns(measurements)
+        count = _measurement_count(measurements)
+        if not count:
             return {"count": 0, "message": "No data available"}
         
-        if pollutant and pollutant.lower() in measurements[0]:
+        if pollutant and pollutant.lower() in columns:
             # Statistiques pour un polluant spécifique
-            values = [m[pollutant.lower()] for m in measurements if pollutant.lower() in m]
-            if values:
+            values = np.asarray(columns[pollutant.lower()], dtype=float)
+            if values.size:
                 return {
-                    "count": len(measurements),
+                    "count": count,
                     "pollutant": pollutant.lower(),
-                    "average": round(sum(values) / len(values), 2),
-                    "minimum": round(min(values), 2),
-                    "maximum": round(max(values), 2),
-                    "median": round(sorted(values)[len(values)//2], 2),
-                    "std_deviation": round(self._calculate_std_dev(values), 2)
+                    "average": round(float(values.mean()), 2),
+                    "minimum": round(float(values.min()), 2),
+                    "maximum": round(float(values.max()), 2),
+                    "median": round(_upper_median(values), 2),
+                    "std_deviation": round(float(values.std()), 2)
                 }
         
         # Statistiques générales
-        aqi_values = [m['aqi'] for m in measurements if 'aqi' in m]
-        pm25_values = [m['pm25'] for m in measurements if 'pm25' in m]
+        aqi_values = np.asarray(columns.get('aqi', ()))
+        pm25_values = np.asarray(columns.get('pm25', ()), dtype=float)
         
         return {
-            "count": len(measurements),
+            "count": count,
             "aqi": {
-                "average": round(sum(aqi_values) / len(aqi_values), 1),
-                "minimum": min(aqi_values),
-                "maximum": max(aqi_values),
-                "median": sorted(aqi_values)[len(aqi_values)//2]
-            } if aqi_values else None,
+                "average": round(float(aqi_values.mean()), 1),
+                "minimum": aqi_values.min().item(),
+                "maximum": aqi_values.max().item(),
+                "median": _upper_median(aqi_values)
+            } if aqi_values.size else None,
             "pm25": {
-                "average": round(sum(pm25_values) / len(pm25_values), 1),
-                "minimum": round(min(pm25_values), 1),
-                "maximum": round(max(pm25_values), 1),
-                "median": round(sorted(pm25_values)[len(pm25_values)//2], 1)
-            } if pm25_values else None
+                "average": round(float(pm25_values.mean()), 1),
+                "minimum": round(float(pm25_values.min()), 1),
+                "maximum": round(float(pm25_values.max()), 1),
+                "median": round(_upper_median(pm25_values), 1)
+            } if pm25_values.size else None
         }
     
-    def _calculate_std_dev(self, values: List[float]) -> float:
-        """Calcule l'écart-type"""
-        if len(values) < 2:
-            return 0
-        mean = sum(values) / len(values)
-        variance = sum((x - mean) ** 2 for x in values) / len(values)
-        return variance ** 0.5
-    
-    def _assess_data_quality(self, measurements: List[Dict]) -> str:
-        """Évalue la qualité des données historiques"""
-        if not measurements:
+    def _assess_data_quality(self, measurements) -> str:
+        """Évalue la qualité des données historiques (liste de mesures ou colonnes)"""
+        count = _measurement_count(measurements)
+        if not count:
             return "No data"
         
         # Vérifier la complétude des données
-        complete_measurements = sum(1 for m in measurements if all(
-            key in m and m[key] is not None 
-            for key in ['pm25', 'pm10', 'no2', 'aqi']
-        ))
+        required = ('pm25', 'pm10', 'no2', 'aqi')
+        if isinstance(measurements, dict):
+            complete_measurements = sum(
+                all(value is not None for value in values)
+                for values in zip(*(measurements[key] for key in required))
+            ) if all(key in measurements for key in required) else 0
+        else:
+            complete_measurements = sum(1 for m in measurements if all(
+                key in m and m[key] is not None 
+                for key in required
+            ))
         
-        completeness_ratio = complete_measurements / len(measurements)
+        completeness_ratio = complete_measurements / count
         
         if completeness_ratio >= 0.9:
             return "High - Most measurements complete"
@@ -453,54 +538,7 @@ class RealAirQualityService:
     
     def _get_health_recommendations(self, aqi: int) -> Dict:
         """Fournit des recommandations de santé basées sur l'AQI"""
-        if aqi <= 50:
-            return {
-                "level": "Good",
-                "color": "green",
-                "message": "Air quality is satisfactory and poses little or no health risk",
-                "activities": "Normal outdoor activities recommended for everyone",
-                "sensitive_groups": "No restrictions"
-            }
-        elif aqi <= 100:
-            return {
-                "level": "Moderate",
-                "color": "yellow", 
-                "message": "Air quality is acceptable, but may be a concern for sensitive individuals",
-                "activities": "Normal activities for most people; sensitive individuals should limit prolonged outdoor exertion",
-                "sensitive_groups": "People with heart or lung disease, older adults, and children should limit prolonged outdoor exertion"
-            }
-        elif aqi <= 150:
-            return {
-                "level": "Unhealthy for Sensitive Groups",
-                "color": "orange",
-                "message": "Sensitive groups may experience health effects",
-                "activities": "Reduce prolonged outdoor exertion, especially for sensitive groups",
-                "sensitive_groups": "People with heart or lung disease, older adults, and children should avoid prolonged outdoor exertion"
-            }
-        elif aqi <= 200:
-            return {
-                "level": "Unhealthy",
-                "color": "red",
-                "message": "Everyone may begin to experience health effects",
-                "activities": "Avoid prolonged outdoor exertion; everyone should reduce outdoor activities",
-                "sensitive_groups": "People with heart or lung disease, older adults, and children should avoid outdoor activities"
-            }
-        elif aqi <= 300:
-            return {
-                "level": "Very Unhealthy",
-                "color": "purple",
-                "message": "Health warnings of emergency conditions",
-                "activities": "Avoid all outdoor activities",
-                "sensitive_groups": "Everyone should avoid all outdoor exertion"
-            }
-        else:
-            return {
-                "level": "Hazardous",
-                "color": "maroon",
-                "message": "Health alert - everyone may experience serious health effects",
-                "activities": "Remain indoors and avoid all outdoor activities",
-                "sensitive_groups": "Everyone should remain indoors with air filtration if possible"
-            }
+        return HEALTH_RECOMMENDATIONS[bisect_left(AQI_CATEGORY_BOUNDS, aqi)]
     
     # Méthodes de fallback
     async def _get_fallback_current_data(self, latitude: float, longitude: float) -> Dict:
@@ -532,14 +570,18 @@ class RealAirQualityService:
             'pressure': 1013.0,
             'visibility': 15.0,
             'data_source': 'Fallback Default Values',
-            'last_updated': datetime.utcnow().isoformat() + "Z",
+            'last_updated': iso_utc(int(time.time())),
             'note': 'Default values used due to data source unavailability'
         }
     
-    async def _get_fallback_forecast_data(self, latitude: float, longitude: float, hours: int) -> Dict:
+    async def _get_fallback_forecast_data(self, latitude: float, longitude: float, hours: int,
+                                          layout: str = 'rows') -> Dict:
         """Données de fallback pour les prédictions"""
         current_data = await self._get_fallback_current_data(latitude, longitude)
-        forecast = self._generate_realistic_forecast(current_data, hours)
+        if layout == 'columns':
+            forecast = self._forecast_columns(current_data, hours)
+        else:
+            forecast = self._generate_realistic_forecast(current_data, hours)
         
         return {
             'location': {
@@ -554,14 +596,14 @@ class RealAirQualityService:
                 'model': 'Fallback Forecast Model',
                 'base_data_source': 'Default values',
                 'confidence': 'Low - Limited data availability',
-                'last_updated': datetime.now().isoformat() + "Z",
+                'last_updated': iso_utc(int(time.time())),
                 'note': 'Fallback predictions due to data source issues'
             }
         }
     
     async def _get_fallback_historical_data(self, latitude: float, longitude: float, 
                                           start_date: datetime, end_date: datetime,
-                                          pollutant: Optional[str] = None) -> Dict:
+                                          pollutant: Optional[str] = None, layout: str = 'rows') -> Dict:
         """Données de fallback pour les données historiques"""
         # Utiliser le service de géolocalisation même en fallback
         try:
@@ -572,33 +614,15 @@ class RealAirQualityService:
             location_name = f"Location {latitude:.3f}, {longitude:.3f}"
             location_info = {}
             
-        # Générer des données basiques pour la période demandée
-        measurements = []
-        current_date = start_date
-        
-        while current_date <= end_date and len(measurements) < 1000:
-            measurement = {
-                'timestamp': current_date.isoformat() + "Z",
-                'aqi': 50,
-                'pm25': 10.0,
-                'pm10': 15.0,
-                'no2': 15.0,
-                'o3': 60.0,
-                'so2': 5.0,
-                'co': 1.0
-            }
-            
-            if pollutant and pollutant.lower() in measurement:
-                filtered_measurement = {
-                    'timestamp': measurement['timestamp'],
-                    'aqi': measurement['aqi'],
-                    pollutant.lower(): measurement[pollutant.lower()]
-                }
-                measurements.append(filtered_measurement)
-            else:
-                measurements.append(measurement)
-            
-            current_date += timedelta(hours=1)
+        # Générer des données basiques pour la période demandée (une mesure par heure, 1000 max),
+        # directement en colonnes, limitées aux champs demandés
+        n = max(0, min(int((end_date - start_date).total_seconds() // 3600) + 1, 1000))
+        fields = FALLBACK_HISTORICAL_VALUES
+        if pollutant and pollutant.lower() in fields:
+            fields = {key: fields[key] for key in ('aqi', pollutant.lower())}
+        columns = {'timestamp': [(start_date + timedelta(hours=i)).isoformat() + "Z" for i in range(n)]}
+        columns.update((key, [value] * n) for key, value in fields.items())
+        measurements = columns if layout == 'columns' else columns_to_rows(columns)
         
         return {
             'location': {
@@ -610,15 +634,15 @@ class RealAirQualityService:
                 'start_date': start_date.isoformat() + "Z",
                 'end_date': end_date.isoformat() + "Z",
                 'total_days': (end_date - start_date).days + 1,
-                'data_points': len(measurements)
+                'data_points': n
             },
             'measurements': measurements,
-            'statistics': self._calculate_historical_statistics(measurements, pollutant),
+            'statistics': self._calculate_historical_statistics(columns, pollutant),
             'metadata': {
                 'pollutant_filter': pollutant if pollutant else 'all',
                 'data_sources': ['Fallback Default Values'],
                 'data_quality': 'Low - Default values only',
-                'generated_at': datetime.now().isoformat() + "Z",
+                'generated_at': iso_utc(int(time.time())),
                 'note': 'Fallback data due to source unavailability'
             }
         }
\ No newline at end of file
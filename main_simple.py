@@ -1,13 +1,18 @@
 """
 API Simple - UN SEUL ENDPOINT qui marche
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
-import random
+from fastapi.responses import ORJSONResponse
+from datetime import date
+from functools import lru_cache
 import math
+import time
+import numpy as np
 
-app = FastAPI(title="Air Quality API", version="1.0.0")
+from app.services._numerics import iso_utc
+
+app = FastAPI(title="Air Quality API", version="1.0.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,67 +21,97 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Générateur aléatoire (PCG64) : toutes les valeurs d'une réponse en un seul tirage
+rng = np.random.default_rng()
+
+# Bornes des tirages : pm25, pm10, no2, aqi (selon le milieu) puis o3, so2, co,
+# écart de température, humidité, vent, pression, visibilité
+URBAN_LOWS = np.array([15, 20, 25, 60, 30, 2, 0.5, -5, 40, 0, 995, 5])
+URBAN_HIGHS = np.array([30, 40, 50, 120, 80, 10, 2.0, 5, 90, 15, 1030, 20])
+RURAL_LOWS = np.array([5, 10, 10, 30, 30, 2, 0.5, -5, 40, 0, 995, 5])
+RURAL_HIGHS = np.array([15, 25, 25, 70, 80, 10, 2.0, 5, 90, 15, 1030, 20])
+SAMPLING_BOUNDS = {True: (URBAN_LOWS, URBAN_HIGHS), False: (RURAL_LOWS, RURAL_HIGHS)}
+WIND_DIRECTIONS = ('N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW')
+
+# Lieux connus en colonnes (SoA) : coordonnées contiguës pour un balayage NumPy unique,
+# noms et rayons (en degrés) alignés par index
+KNOWN_LOCATION_LATLON = np.ascontiguousarray([
+    (48.8566, 2.3522),   # Paris
+    (43.6532, -79.3832), # Toronto
+], dtype=np.float64)
+KNOWN_LOCATION_NAMES = ("Paris, France", "Toronto, Canada")
+KNOWN_LOCATION_NAME_RADIUS = np.array([1, 1], dtype=np.float64)
+KNOWN_LOCATION_URBAN_RADIUS = np.array([5, 0], dtype=np.float64)
+
+def resolve_location(latitude: float, longitude: float):
+    """Nom de lieu et caractère urbain déterminés en un seul balayage des lieux connus"""
+    # Écart max(|dlat|, |dlon|) vers chaque lieu, calculé d'un bloc
+    distance = np.abs(KNOWN_LOCATION_LATLON - np.array((latitude, longitude))).max(axis=1)
+    name_hits = np.flatnonzero(distance < KNOWN_LOCATION_NAME_RADIUS)
+    # Comme le parcours séquentiel : seuls les lieux jusqu'au premier nom trouvé comptent
+    stop = name_hits[0] + 1 if name_hits.size else len(KNOWN_LOCATION_NAMES)
+    is_urban = bool((distance[:stop] < KNOWN_LOCATION_URBAN_RADIUS[:stop]).any())
+    if name_hits.size:
+        return KNOWN_LOCATION_NAMES[name_hits[0]], is_urban
+    return f"Location {latitude:.2f}, {longitude:.2f}", is_urban
+
+def sample_baseline(is_urban: bool) -> np.ndarray:
+    """Toutes les valeurs simulées d'une réponse (ordre des bornes) en un seul tirage vectoriel"""
+    return rng.uniform(*SAMPLING_BOUNDS[is_urban])
+
+@lru_cache(maxsize=1)
+def season_for(day_ordinal: int) -> float:
+    """Facteur saisonnier du jour (recalculé seulement au changement de date)"""
+    day_of_year = date.fromordinal(day_ordinal).timetuple().tm_yday
+    return math.sin(2 * math.pi * day_of_year / 365)
+
 @app.get("/")
-def root():
+async def root():
     return {"message": "API fonctionne", "endpoint": "/location/full?latitude=45.5&longitude=2.3"}
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "healthy"}
 
 @app.get("/location/full")
-def get_location_full(latitude: float, longitude: float):
+async def get_location_full(
+    latitude: float = Query(..., ge=-90, le=90, description="Latitude (-90 à 90)"),
+    longitude: float = Query(..., ge=-180, le=180, description="Longitude (-180 à 180)")
+):
     """L'UNIQUE endpoint demandé"""
     
-    # Validation simple
-    if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
-        raise HTTPException(status_code=400, detail="Coordonnées invalides")
-    
-    # Données simulées réalistes
-    is_urban = abs(latitude - 48.8566) < 5 and abs(longitude - 2.3522) < 5  # Près de Paris = urbain
-    
-    if is_urban:
-        # Ville polluée
-        pm25 = random.uniform(15, 30)
-        pm10 = random.uniform(20, 40)
-        no2 = random.uniform(25, 50)
-        aqi = int(random.uniform(60, 120))
-    else:
-        # Campagne
-        pm25 = random.uniform(5, 15)
-        pm10 = random.uniform(10, 25)
-        no2 = random.uniform(10, 25)
-        aqi = int(random.uniform(30, 70))
-    
-    # Nom de lieu simple
-    if abs(latitude - 48.8566) < 1 and abs(longitude - 2.3522) < 1:
-        name = "Paris, France"
-    elif abs(latitude - 43.6532) < 1 and abs(longitude + 79.3832) < 1:
-        name = "Toronto, Canada"
-    else:
-        name = f"Location {latitude:.2f}, {longitude:.2f}"
+    # Données simulées réalistes (près de Paris = urbain)
+    name, is_urban = resolve_location(latitude, longitude)
     
     # Météo réaliste
-    season = math.sin(2 * math.pi * datetime.now().timetuple().tm_yday / 365)
+    season = season_for(date.today().toordinal())
     base_temp = 15 + season * 10 + (90 - abs(latitude)) / 3
     
+    # Ville polluée ou campagne ; arrondis appliqués d'un bloc sur le vecteur tiré
+    sample = sample_baseline(is_urban)
+    aqi = int(sample[3])
+    sample[7] += base_temp  # écart de température -> température
+    rounded = sample.round(1)
+    rounded[6] = sample[6].round(2)  # CO au centième
+    pm25, pm10, no2, _, o3, so2, co, temperature, humidity, wind_speed, pressure, visibility = rounded.tolist()
+    
     return {
         "name": name,
         "coordinates": [latitude, longitude],
         "aqi": aqi,
-        "pm25": round(pm25, 1),
-        "pm10": round(pm10, 1),
-        "no2": round(no2, 1),
-        "o3": round(random.uniform(30, 80), 1),
-        "so2": round(random.uniform(2, 10), 1),
-        "co": round(random.uniform(0.5, 2.0), 2),
-        "temperature": round(base_temp + random.uniform(-5, 5), 1),
-        "humidity": round(random.uniform(40, 90), 1),
-        "windSpeed": round(random.uniform(0, 15), 1),
-        "windDirection": random.choice(['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']),
-        "pressure": round(random.uniform(995, 1030), 1),
-        "visibility": round(random.uniform(5, 20), 1),
-        "lastUpdated": datetime.utcnow().isoformat() + "Z"
+        "pm25": pm25,
+        "pm10": pm10,
+        "no2": no2,
+        "o3": o3,
+        "so2": so2,
+        "co": co,
+        "temperature": temperature,
+        "humidity": humidity,
+        "windSpeed": wind_speed,
+        "windDirection": WIND_DIRECTIONS[rng.integers(len(WIND_DIRECTIONS))],
+        "pressure": pressure,
+        "visibility": visibility,
+        "lastUpdated": iso_utc(int(time.time()))
     }
 
 if __name__ == "__main__":
@@ -122,10 +122,15 @@ def main():
         host = os.getenv('HOST', '0.0.0.0')
         port = int(os.getenv('PORT', 8000))
         reload = os.getenv('DEBUG', 'False').lower() == 'true'
+        # A single process unless WEB_CONCURRENCY says otherwise (reload mode only supports
+        # one). os.cpu_count() reports the host's cores inside containers, and workers do not
+        # share memory: each one keeps its own warmed kernels, services and caches
+        workers = 1 if reload else int(os.getenv('WEB_CONCURRENCY', 1))
         
         logger.info(f"Starting server on http://{host}:{port}")
         logger.info(f"API documentation: http://{host}:{port}/docs")
         logger.info(f"Reload mode: {reload}")
+        logger.info(f"Workers: {workers}")
         logger.info("="*50)
         
         # Start the server
@@ -135,6 +140,7 @@ def main():
             port=port,
             reload=reload,
             reload_dirs=[str(project_root)] if reload else None,
+            workers=workers,
             log_level="info",
             access_log=True
         )